@@ -0,0 +1,299 @@
+"""
+Measure the CPU cost of each step of ingesting an event or registration, for
+representative and worst-case payloads, and compare it against a baseline.
+
+Each case is timed in several rounds of many calls, and the fastest round is
+taken, as it is the least affected by other activity on the machine. All of the
+cases are timed `--repeat` times, one after another, and the median of each
+case's timings is reported, so that a burst of activity during one repetition
+does not skew the results. With `--save`, the results are written as the new
+baseline (replacing only the cases that were run). Otherwise, they are compared
+against the saved baseline, and the command fails if any case is slower than
+the baseline by more than the `--threshold`.
+
+Even so, results vary between runs by up to around 30% on a busy machine, so the
+default threshold is well above that. Use a lower threshold only on a quiet
+machine.
+
+Baselines are specific to the machine and Python version on which they were
+recorded, so save a new baseline before comparing results from a different one.
+
+Endpoint templating is enabled, as it is the more expensive option. Endpoint
+validation and templating results are cached, so the `.uncached` cases show the
+cost of handling an endpoint that has not been seen recently. The
+`encode_response` and `sdk_serialize` cases compare the standard library's JSON
+encoder with orjson, if it is installed, for API response bodies and SDK
+request bodies respectively.
+
+Usage: python -m benchmarks.hot_path [--save] [--threshold 0.5] [--repeat 3]
+    [--cases validate] [--baseline benchmarks/baselines/hot_path.json]
+"""
+
+# pylint: disable=wrong-import-position
+
+import json
+import os
+import platform
+import sys
+from argparse import ArgumentParser
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from timeit import Timer
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("FIDESLOG__STORAGE_BUCKET_NAME", "benchmark")
+os.environ.setdefault("FIDESLOG__EVENTS_TEMPLATE_ENDPOINTS", "true")
+
+from fastapi.encoders import jsonable_encoder
+
+from fideslog.api.database.csv_writer import write_csv_object
+from fideslog.api.database.events import endpoint_templates, truncate_endpoint_url
+from fideslog.api.schemas.analytics_event import AnalyticsEvent, endpoint_cache
+from fideslog.api.schemas.registration import Registration
+from fideslog.api.schemas.validation import check_in_the_past
+from fideslog.api.serialization import encode_with_json
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "hot_path.json")
+ROUNDS = 3
+
+CREATED_AT = datetime.now(timezone.utc) - timedelta(minutes=1)
+ENDPOINT = "GET: https://fides.example.com/api/v1/system/my_system"
+ID_ENDPOINT = (
+    "GET: https://fides.example.com/api/v1/privacy-request/"
+    "pri_0d5e2d1a-4b6e-4ad4-9d1e-8bb1a3b1c2d3/log"
+)
+LONG_ENDPOINT = (
+    "PATCH: https://fides.example.com:8080/api/v1/"
+    + "/".join(f"segment_{i}" for i in range(50))
+    + "?"
+    + "&".join(f"key_{i}=value_{i}" for i in range(50))
+    + "#fragment"
+)
+
+CLI_EVENT = {
+    "client_id": "d9b8a2a0c5e64a5c9c6e2b8f9f2f8e1a",
+    "event": "cli_command_executed",
+    "event_created_at": CREATED_AT.isoformat(),
+    "os": "Linux",
+    "product_name": "fidesctl",
+    "production_version": "1.2.3",
+    "command": "fidesctl apply",
+    "docker": True,
+    "flags": ["--dry", "--diff"],
+    "resource_counts": {"datasets": 7, "policies": 26, "systems": 9},
+    "status_code": 0,
+}
+API_EVENT = {
+    **CLI_EVENT,
+    "command": None,
+    "endpoint": ENDPOINT,
+    "event": "endpoint_call",
+    "flags": None,
+    "local_host": True,
+    "status_code": 200,
+}
+LARGE_EXTRA_DATA_EVENT = {
+    **CLI_EVENT,
+    "extra_data": {
+        f"key_{i}": {"values": list(range(10)), "label": f"value_{i}" * 4}
+        for i in range(200)
+    },
+}
+MANY_FLAGS_EVENT = {
+    **CLI_EVENT,
+    "flags": [f"--flag-{i}=value {i}" for i in range(500)],
+}
+REGISTRATION = {
+    "client_id": "d9b8a2a0c5e64a5c9c6e2b8f9f2f8e1a",
+    "email": "user@example.com",
+    "organization": "Ethyca",
+    "created_at": CREATED_AT.isoformat(),
+    "updated_at": CREATED_AT.isoformat(),
+}
+
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    """Return each benchmarked case, by name."""
+
+    cli_event = AnalyticsEvent.validate(CLI_EVENT)
+    large_event = AnalyticsEvent.validate(LARGE_EXTRA_DATA_EVENT)
+    many_flags_event = AnalyticsEvent.validate(MANY_FLAGS_EVENT)
+    cli_content = jsonable_encoder(cli_event)
+    large_content = jsonable_encoder(large_event)
+
+    def uncached(case: Callable[[], object]) -> Callable[[], object]:
+        """Run `case` without any previously validated endpoints."""
+
+        def run() -> object:
+            endpoint_cache.clear()
+            endpoint_templates.template.cache_clear()
+            return case()
+
+        return run
+
+    cases: Dict[str, Callable[[], object]] = {
+        "validate_event.cli": lambda: AnalyticsEvent.validate(CLI_EVENT),
+        "validate_event.api": lambda: AnalyticsEvent.validate(API_EVENT),
+        "validate_event.api.uncached": uncached(
+            lambda: AnalyticsEvent.validate(API_EVENT)
+        ),
+        "validate_event.large_extra_data": lambda: AnalyticsEvent.validate(
+            LARGE_EXTRA_DATA_EVENT
+        ),
+        "validate_event.many_flags": lambda: AnalyticsEvent.validate(MANY_FLAGS_EVENT),
+        "validate_endpoint_format.short": lambda: (
+            AnalyticsEvent.validate_endpoint_format(ENDPOINT)
+        ),
+        "validate_endpoint_format.long": lambda: (
+            AnalyticsEvent.validate_endpoint_format(LONG_ENDPOINT)
+        ),
+        "validate_endpoint_format.short.uncached": uncached(
+            lambda: AnalyticsEvent.validate_endpoint_format(ENDPOINT)
+        ),
+        "validate_endpoint_format.long.uncached": uncached(
+            lambda: AnalyticsEvent.validate_endpoint_format(LONG_ENDPOINT)
+        ),
+        "check_in_the_past": lambda: check_in_the_past(CREATED_AT),
+        "truncate_endpoint_url.short": lambda: truncate_endpoint_url(ENDPOINT),
+        "truncate_endpoint_url.long": lambda: truncate_endpoint_url(LONG_ENDPOINT),
+        "truncate_endpoint_url.id": lambda: truncate_endpoint_url(ID_ENDPOINT),
+        "truncate_endpoint_url.id.uncached": uncached(
+            lambda: truncate_endpoint_url(ID_ENDPOINT)
+        ),
+        "write_csv_object.cli": lambda: write_csv_object(cli_event),
+        "write_csv_object.large_extra_data": lambda: write_csv_object(large_event),
+        "write_csv_object.many_flags": lambda: write_csv_object(many_flags_event),
+        "validate_registration": lambda: Registration.validate(REGISTRATION),
+        "encode_response.cli.json": lambda: encode_with_json(cli_content),
+        "encode_response.large_extra_data.json": lambda: encode_with_json(
+            large_content
+        ),
+        "sdk_serialize.cli.json": lambda: json.dumps(CLI_EVENT),
+        "sdk_serialize.large_extra_data.json": lambda: json.dumps(
+            LARGE_EXTRA_DATA_EVENT
+        ),
+    }
+    try:
+        from orjson import dumps  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return cases
+
+    return {
+        **cases,
+        "encode_response.cli.orjson": lambda: dumps(cli_content),
+        "encode_response.large_extra_data.orjson": lambda: dumps(large_content),
+        "sdk_serialize.cli.orjson": lambda: dumps(CLI_EVENT).decode(),
+        "sdk_serialize.large_extra_data.orjson": lambda: dumps(
+            LARGE_EXTRA_DATA_EVENT
+        ).decode(),
+    }
+
+
+def time_cases(
+    cases: Dict[str, Callable[[], object]],
+    repeat: int,
+) -> Dict[str, float]:
+    """
+    Return the median, over `repeat` repetitions, of the fastest time taken by
+    a single call to each case, in ns.
+    """
+
+    timers = {name: Timer(case) for name, case in cases.items()}
+    calls = {name: timer.autorange()[0] for name, timer in timers.items()}
+    timings: Dict[str, List[float]] = {name: [] for name in cases}
+    for _ in range(repeat):
+        for name, timer in timers.items():
+            fastest = min(timer.repeat(ROUNDS, calls[name]))
+            timings[name].append(fastest / calls[name] * 1e9)
+
+    return {name: round(median(times), 1) for name, times in timings.items()}
+
+
+def get_environment() -> Dict[str, str]:
+    """Describe the environment in which the results were recorded."""
+
+    return {
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "system": platform.system(),
+    }
+
+
+def compare(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    threshold: float,
+) -> List[str]:
+    """
+    Print each result alongside its baseline, returning the names of
+    the cases that have regressed by more than `threshold`.
+    """
+
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        change = "" if expected is None else f"{result / expected - 1:>+8.1%}"
+        print(f"{name:<40} {result:>12,.0f}ns  {change}")
+        if expected is not None and result > expected * (1 + threshold):
+            regressions.append(name)
+
+    return regressions
+
+
+def main() -> None:
+    """Run the benchmarks."""
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--cases", help="Only run cases whose names contain this")
+    parser.add_argument("--save", action="store_true", help="Save a new baseline")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Time every case this many times"
+    )
+    args = parser.parse_args()
+
+    cases = {
+        name: case
+        for name, case in build_cases().items()
+        if not args.cases or args.cases in name
+    }
+    results = time_cases(cases, args.repeat)
+
+    baseline: Optional[Dict[str, Dict[str, float]]] = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    if args.save:
+        compare(results, {}, args.threshold)
+        saved = baseline["results_ns"] if baseline and args.cases else {}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(
+                {"environment": get_environment(), "results_ns": {**saved, **results}},
+                file,
+                indent=2,
+            )
+            file.write("\n")
+
+        print(f"Saved the baseline to {args.baseline}")
+        return
+
+    if baseline is None:
+        compare(results, {}, args.threshold)
+        print(f"No baseline found at {args.baseline}. Run with --save to create one.")
+        return
+
+    if baseline["environment"] != get_environment():
+        print(f"Warning: the baseline was recorded in {baseline['environment']}")
+
+    regressions = compare(results, baseline["results_ns"], args.threshold)
+    if regressions:
+        print(f"Slower than the baseline by more than {args.threshold:.0%}:")
+        print("\n".join(f"  {name}" for name in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
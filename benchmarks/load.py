@@ -0,0 +1,477 @@
+"""
+Measure the throughput and latency of the API server under load, to size
+deployments and catch regressions.
+
+The server is started with uvicorn in a separate process, storing events in a
+local S3 stand-in (which writes each object to a temporary directory) and
+registrations in a SQLite database. Requests are sent by concurrent asyncio
+workers, choosing each request at random from a weighted mix of:
+
+- `event`: an analytics event submitted by a CLI command
+- `api_event`: an analytics event submitted by an API server request
+- `registration`: a new registration
+
+The server's CPU time and memory usage are read from /proc, so are only
+reported on Linux.
+
+Usage: python -m benchmarks.load [--concurrency 50] [--duration 30] [--warm-up 5]
+    [--mix event=9,registration=1] [--workers 1] [--output FILE]
+"""
+
+# pylint: disable=wrong-import-position
+
+import json
+import os
+import socket
+import subprocess
+import sys
+from argparse import ArgumentParser
+from asyncio import create_task, gather, run, sleep
+from datetime import datetime, timedelta, timezone
+from hashlib import md5
+from multiprocessing import Process
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+os.environ.setdefault("FIDESLOG__STORAGE_BUCKET_NAME", "benchmark")
+
+from aiohttp import ClientError, ClientSession, TCPConnector, web
+from sqlalchemy import create_engine
+
+from fideslog.api.database import Base
+from fideslog.api.models import models  # pylint: disable=unused-import
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_TIMEOUT = 30
+USAGE_SAMPLE_INTERVAL = 0.5
+
+RequestSpec = Tuple[str, str, Optional[Dict[str, object]]]
+
+
+class Result(NamedTuple):
+    """The outcome of a single request."""
+
+    kind: str
+    started: float
+    latency: float
+    status: int
+    error: Optional[str]  # The type of error, if no response was received
+
+
+class Usage(NamedTuple):
+    """The resources used by the server's processes."""
+
+    cpu_seconds: float
+    rss_bytes: int
+
+
+def get_free_port() -> int:
+    """Return a port on which nothing is currently listening."""
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_storage_stand_in(port: int, directory: str) -> None:
+    """
+    Serve the S3 `PutObject` operation with path-style addressing, writing
+    each object to `directory`.
+    """
+
+    async def put_object(request: web.Request) -> web.Response:
+        body = await request.read()
+        name = request.match_info["key"].replace("/", "_")
+        with open(os.path.join(directory, name), "wb") as file:
+            file.write(body)
+
+        return web.Response(headers={"ETag": f'"{md5(body).hexdigest()}"'})
+
+    app = web.Application(client_max_size=1024**2)
+    app.router.add_put("/{bucket}/{key:.+}", put_object)
+    web.run_app(
+        app, host="127.0.0.1", port=port, print=lambda *_: None, access_log=None
+    )
+
+
+def start_server(
+    port: int,
+    storage_url: str,
+    database_url: str,
+    workers: int,
+) -> "subprocess.Popen[bytes]":
+    """Start the API server, which writes its logs to nowhere."""
+
+    env = {
+        **os.environ,
+        "AWS_EC2_METADATA_DISABLED": "true",
+        "FIDESLOG__DATABASE_DB_CONNECTION_URI": database_url,
+        "FIDESLOG__SERVER_IP_RATE_LIMIT": "1000000000/minute",
+        "FIDESLOG__SERVER_REQUEST_RATE_LIMIT": "1000000000/minute",
+        "FIDESLOG__STORAGE_AWS_ACCESS_KEY_ID": "benchmark",
+        "FIDESLOG__STORAGE_AWS_SECRET_ACCESS_KEY": "benchmark",
+        "FIDESLOG__STORAGE_BUCKET_NAME": "benchmark",
+        "FIDESLOG__STORAGE_ENDPOINT_URL": storage_url,
+        "FIDESLOG__STORAGE_REGION_NAME": "us-east-1",
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [REPOSITORY_ROOT, os.environ.get("PYTHONPATH")])
+        ),
+    }
+
+    # pylint: disable=consider-using-with
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "fideslog.api.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_healthy(session: ClientSession, url: str) -> None:
+    """Wait for the API server to respond to `/health`."""
+
+    deadline = perf_counter() + STARTUP_TIMEOUT
+    while perf_counter() < deadline:
+        try:
+            async with session.get(f"{url}/health") as response:
+                if response.status == 200:
+                    return
+        except ClientError:
+            pass
+
+        await sleep(0.1)
+
+    raise TimeoutError(f"The API server did not start within {STARTUP_TIMEOUT}s")
+
+
+def get_process_tree(pid: int) -> List[int]:
+    """Return `pid` and the IDs of all of its descendants."""
+
+    pids = [pid]
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children", encoding="utf-8") as file:
+                for child in file.read().split():
+                    pids.extend(get_process_tree(int(child)))
+    except OSError:
+        pass
+
+    return pids
+
+
+def read_usage(pid: int) -> Optional[Usage]:
+    """
+    Return the CPU time and resident memory of `pid` and its descendants,
+    or `None` if they cannot be read.
+    """
+
+    cpu_seconds = 0.0
+    rss_bytes = 0
+    try:
+        for process in get_process_tree(pid):
+            with open(f"/proc/{process}/stat", encoding="utf-8") as file:
+                fields = file.read().rsplit(")", 1)[1].split()
+
+            # utime and stime, in clock ticks; and the resident set size, in pages
+            cpu_seconds += (int(fields[11]) + int(fields[12])) / os.sysconf(
+                "SC_CLK_TCK"
+            )
+            rss_bytes += int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+    return Usage(cpu_seconds, rss_bytes)
+
+
+def build_request_specs(rng: Random) -> Dict[str, Callable[[], RequestSpec]]:
+    """Return a function per kind of request, each returning a new request."""
+
+    def event(**fields: object) -> Dict[str, object]:
+        return {
+            "client_id": f"{rng.getrandbits(64):016x}",
+            "event": "cli_command_executed",
+            "event_created_at": (
+                datetime.now(timezone.utc) - timedelta(seconds=1)
+            ).isoformat(),
+            "os": "Linux",
+            "product_name": "fidesctl",
+            "production_version": "1.2.3",
+            "developer": False,
+            "docker": True,
+            "resource_counts": {"datasets": 7, "policies": 26, "systems": 9},
+            **fields,
+        }
+
+    def registration() -> Dict[str, object]:
+        number = rng.getrandbits(64)
+        return {
+            "client_id": f"{number:016x}",
+            "email": f"user{number}@example.com",
+            "organization": "Ethyca",
+        }
+
+    return {
+        "event": lambda: (
+            "POST",
+            "/events",
+            event(command="fidesctl apply", flags=["--dry"], status_code=0),
+        ),
+        "api_event": lambda: (
+            "POST",
+            "/events",
+            event(
+                endpoint="GET: https://fides.example.com/api/v1/system/my_system",
+                local_host=True,
+                status_code=200,
+            ),
+        ),
+        "registration": lambda: ("POST", "/registrations", registration()),
+    }
+
+
+async def send_requests(
+    session: ClientSession,
+    url: str,
+    kinds: List[str],
+    weights: List[int],
+    rng: Random,
+    stop_at: float,
+) -> List[Result]:
+    """Send requests from the weighted mix of `kinds` until `stop_at`."""
+
+    specs = build_request_specs(rng)
+    results = []
+    while perf_counter() < stop_at:
+        kind = rng.choices(kinds, weights)[0]
+        method, path, body = specs[kind]()
+
+        started = perf_counter()
+        status, error = 0, None
+        try:
+            async with session.request(method, url + path, json=body) as response:
+                await response.read()
+                status = response.status
+        except (ClientError, TimeoutError) as err:
+            error = type(err).__name__
+
+        results.append(Result(kind, started, perf_counter() - started, status, error))
+
+    return results
+
+
+async def sample_usage(pid: int, samples: List[Usage]) -> None:
+    """Record the server's resource usage periodically, until cancelled."""
+
+    while True:
+        usage = read_usage(pid)
+        if usage is not None:
+            samples.append(usage)
+
+        await sleep(USAGE_SAMPLE_INTERVAL)
+
+
+async def generate_load(
+    url: str,
+    pid: int,
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    warm_up: float,
+) -> Tuple[List[Result], List[Usage]]:
+    """
+    Send requests to the server at `url` with `concurrency` workers for the
+    warm-up period and then the `duration`. Returns the result of each request
+    begun after the warm-up, and samples of the server's resource usage.
+    """
+
+    headers = {"X-Fideslog-Version": "benchmark"}
+    connector = TCPConnector(limit=concurrency)
+    async with ClientSession(headers=headers, connector=connector) as session:
+        await wait_until_healthy(session, url)
+
+        start = perf_counter()
+        measure_from = start + warm_up
+        stop_at = measure_from + duration
+        workers = [
+            send_requests(
+                session,
+                url,
+                list(mix),
+                list(mix.values()),
+                Random(worker),
+                stop_at,
+            )
+            for worker in range(concurrency)
+        ]
+
+        workers_task = gather(*workers)
+        await sleep(warm_up)
+
+        usage: List[Usage] = []
+        sampler = create_task(sample_usage(pid, usage))
+        results = await workers_task
+        sampler.cancel()
+        final_usage = read_usage(pid)
+        if final_usage is not None:
+            usage.append(final_usage)
+
+    measured = [
+        result
+        for worker_results in results
+        for result in worker_results
+        if result.started >= measure_from
+    ]
+    return measured, usage
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the value at `fraction` of `sorted_values`, by nearest rank."""
+
+    if not sorted_values:
+        return 0.0
+
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+def summarize(
+    results: List[Result],
+    usage: List[Usage],
+    duration: float,
+    stored_objects: int,
+) -> Dict[str, object]:
+    """Report the throughput, latency, and resource usage of the run."""
+
+    latencies = sorted(result.latency for result in results)
+    statuses: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+    kinds: Dict[str, int] = {}
+    for result in results:
+        kinds[result.kind] = kinds.get(result.kind, 0) + 1
+        if result.error is None:
+            statuses[str(result.status)] = statuses.get(str(result.status), 0) + 1
+        else:
+            errors[result.error] = errors.get(result.error, 0) + 1
+
+    server: Dict[str, object] = {}
+    if len(usage) > 1:
+        cpu_seconds = usage[-1].cpu_seconds - usage[0].cpu_seconds
+        server = {
+            "cpu_seconds": round(cpu_seconds, 3),
+            "cpu_percent": round(cpu_seconds / duration * 100, 1),
+            "rss_mb": round(usage[-1].rss_bytes / 1024**2, 1),
+            "peak_rss_mb": round(max(u.rss_bytes for u in usage) / 1024**2, 1),
+        }
+
+    return {
+        "requests": len(results),
+        "throughput_rps": round(len(results) / duration, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.5) * 1e3, 2),
+            "p95": round(percentile(latencies, 0.95) * 1e3, 2),
+            "p99": round(percentile(latencies, 0.99) * 1e3, 2),
+            "max": round(latencies[-1] * 1e3 if latencies else 0, 2),
+        },
+        "kinds": kinds,
+        "statuses": statuses,
+        "errors": errors,
+        "stored_objects": stored_objects,
+        "server": server,
+    }
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Parse a mix of request kinds, such as `event=8,registration=1`."""
+
+    mix = {}
+    for item in value.split(","):
+        kind, _, weight = item.partition("=")
+        mix[kind.strip()] = int(weight or 1)
+
+    return mix
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warm-up", type=float, default=5)
+    parser.add_argument("--mix", type=parse_mix, default="event=9,registration=1")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="A file to which to write the results as JSON")
+    args = parser.parse_args()
+
+    unknown = set(args.mix) - set(build_request_specs(Random()))
+    if unknown:
+        parser.error(f"Unknown request kinds: {', '.join(sorted(unknown))}")
+
+    with TemporaryDirectory(prefix="fideslog-load-") as directory:
+        objects = os.path.join(directory, "objects")
+        os.mkdir(objects)
+        database_url = f"sqlite:///{os.path.join(directory, 'registrations.db')}"
+        Base.metadata.create_all(create_engine(database_url))
+
+        storage_port = get_free_port()
+        storage = Process(
+            target=run_storage_stand_in,
+            args=(storage_port, objects),
+            daemon=True,
+        )
+        storage.start()
+
+        port = get_free_port()
+        server = start_server(
+            port,
+            f"http://127.0.0.1:{storage_port}",
+            database_url,
+            args.workers,
+        )
+        try:
+            results, usage = run(
+                generate_load(
+                    f"http://127.0.0.1:{port}",
+                    server.pid,
+                    args.mix,
+                    args.concurrency,
+                    args.duration,
+                    args.warm_up,
+                )
+            )
+        finally:
+            server.terminate()
+            server.wait()
+            storage.terminate()
+
+        summary = {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "mix": args.mix,
+            "workers": args.workers,
+            **summarize(results, usage, args.duration, len(os.listdir(objects))),
+        }
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(summary, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
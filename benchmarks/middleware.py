@@ -0,0 +1,176 @@
+"""
+Measure the per-request overhead of the API server's request middleware, comparing
+the previous stack of `@app.middleware("http")` functions against the single ASGI
+`RequestMiddleware` now in use. Requests are sent directly to each ASGI app, so no
+network or server overhead is included.
+
+Usage: python -m benchmarks.middleware [--requests 5000]
+"""
+
+# pylint: disable=wrong-import-position
+
+import logging
+import os
+from argparse import ArgumentParser
+from asyncio import Event, run
+from datetime import datetime
+from hmac import compare_digest
+from http import HTTPStatus
+from time import perf_counter
+from typing import Callable, List
+
+os.environ.setdefault("FIDESLOG__DATABASE_ACCOUNT", "benchmark")
+os.environ.setdefault("FIDESLOG__DATABASE_PASSWORD", "benchmark")
+os.environ.setdefault("FIDESLOG__DATABASE_USER", "benchmark")
+os.environ.setdefault("FIDESLOG__STORAGE_BUCKET_NAME", "benchmark")
+os.environ.setdefault("FIDESLOG__SERVER_REQUEST_RATE_LIMIT", "1000000/minute")
+
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse
+from starlette.types import Message
+
+from fideslog.api.config import config
+from fideslog.api.middleware import RequestMiddleware
+
+log = logging.getLogger("fideslog.benchmarks")
+
+
+async def health(_: Request) -> JSONResponse:
+    """A handler that does no work of its own."""
+
+    return JSONResponse({"status": "healthy"})
+
+
+def build_function_middleware_app() -> FastAPI:
+    """The middleware stack as it was implemented before `RequestMiddleware`."""
+
+    app = FastAPI()
+    app.add_api_route("/events", health, methods=["POST"])
+
+    @app.middleware("http")
+    async def require_access_token(request: Request, call_next: Callable) -> Response:
+        token = request.headers.get("Authorization", "").lstrip("Token ")
+        if (request.method, request.url.path) not in [
+            ("GET", "/registrations"),
+        ] or compare_digest(token, config.security.access_token):
+            return await call_next(request)
+
+        return JSONResponse({"error": "Unauthorized"}, status.HTTP_401_UNAUTHORIZED)
+
+    @app.middleware("http")
+    async def require_version_header(request: Request, call_next: Callable) -> Response:
+        excluded_endpoints = ["/docs", "/health", "/openapi.json", "/redoc"]
+        version = request.headers.get("x-fideslog-version", None)
+        if version is None and request.url.path not in excluded_endpoints:
+            return JSONResponse({"error": "Missing"}, status.HTTP_400_BAD_REQUEST)
+
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def log_request(request: Request, call_next: Callable) -> Response:
+        start = datetime.now()
+        response = await call_next(request)
+        handler_time = round((datetime.now() - start).microseconds * 0.001, 3)
+        log.info(
+            'Request received (handled in %sms):\t"%s %s" %s',
+            handler_time,
+            request.method,
+            request.url.path,
+            f"{response.status_code} {HTTPStatus(response.status_code).phrase}",
+        )
+        return response
+
+    return app
+
+
+def build_asgi_middleware_app() -> FastAPI:
+    """The middleware stack as it is currently implemented."""
+
+    app = FastAPI()
+    app.add_api_route("/events", health, methods=["POST"])
+    app.add_middleware(RequestMiddleware)
+    return app
+
+
+def build_bare_app() -> FastAPI:
+    """No middleware at all, as a baseline."""
+
+    app = FastAPI()
+    app.add_api_route("/events", health, methods=["POST"])
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> List[float]:
+    """Send `requests` requests to `app`, returning the duration of each."""
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/events",
+        "raw_path": b"/events",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"x-fideslog-version", b"1.0.0")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8080),
+    }
+
+    durations = []
+    for _ in range(requests):
+        request_sent = False
+        response_complete = Event()
+
+        async def receive() -> Message:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            await response_complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Message) -> None:
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                response_complete.set()
+
+        start = perf_counter()
+        await app(scope, receive, send)
+        durations.append(perf_counter() - start)
+
+    return durations
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.getLogger("fideslog").setLevel(logging.WARNING)
+    apps = {
+        "no middleware": build_bare_app(),
+        "function middleware": build_function_middleware_app(),
+        "ASGI middleware": build_asgi_middleware_app(),
+    }
+
+    baseline = None
+    for name, app in apps.items():
+        run(measure(app, args.requests // 10))  # Warm up
+        durations = sorted(run(measure(app, args.requests)))
+        mean = sum(durations) / len(durations)
+        baseline = baseline or mean
+        print(
+            f"{name:<20} mean {mean * 1e6:>7.1f}us"
+            f"  p99 {durations[int(len(durations) * 0.99)] * 1e6:>7.1f}us"
+            f"  overhead {(mean - baseline) * 1e6:>6.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
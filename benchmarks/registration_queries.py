@@ -0,0 +1,131 @@
+"""
+Compare the cost of the registration queries in `fideslog.api.database.registrations`
+when compiled on every execution (as the Snowflake dialect requires) against the
+precompiled statements now in use.
+
+Usage: python -m benchmarks.registration_queries [--rows 1000] [--iterations 2000]
+"""
+
+# pylint: disable=wrong-import-position
+
+import os
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from timeit import timeit
+from typing import Callable, Dict
+
+os.environ.setdefault("FIDESLOG__DATABASE_ACCOUNT", "benchmark")
+os.environ.setdefault("FIDESLOG__DATABASE_PASSWORD", "benchmark")
+os.environ.setdefault("FIDESLOG__DATABASE_USER", "benchmark")
+os.environ.setdefault("FIDESLOG__STORAGE_BUCKET_NAME", "benchmark")
+
+from snowflake.sqlalchemy.snowdialect import SnowflakeDialect
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from fideslog.api.database.registrations import (
+    email_blind_index,
+    query_registrations,
+    select_by_client_id,
+    select_page,
+)
+from fideslog.api.database.statements import precompiled
+from fideslog.api.models.models import Registration
+
+
+def seed(database: Session, rows: int) -> None:
+    """Insert `rows` registrations."""
+
+    now = datetime.now(timezone.utc)
+    database.add_all(
+        Registration(
+            client_id=f"client_{i}",
+            email=f"user_{i}@example.com",
+            email_index=email_blind_index(f"user_{i}@example.com"),
+            organization="Benchmark",
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(rows)
+    )
+    database.commit()
+
+
+def report(name: str, results: Dict[str, float]) -> None:
+    """Print the per-call cost of each approach, in microseconds."""
+
+    baseline = results["compiled per call"]
+    print(name)
+    for label, seconds in results.items():
+        print(f"  {label:<20} {seconds * 1e6:>9.1f}us  ({baseline / seconds:.1f}x)")
+
+
+def measure(iterations: int, **approaches: Callable[[], object]) -> Dict[str, float]:
+    """Return the mean duration of each approach, in seconds."""
+
+    return {
+        label.replace("_", " "): timeit(approach, number=iterations) / iterations
+        for label, approach in approaches.items()
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    snowflake = SnowflakeDialect()
+    report(
+        "Compile only (Snowflake dialect)",
+        measure(
+            args.iterations,
+            compiled_per_call=lambda: select_page().compile(dialect=snowflake),
+            precompiled=lambda: precompiled(select_page, snowflake).compile(
+                dialect=snowflake
+            ),
+        ),
+    )
+
+    # Disabling the compiled cache reproduces the Snowflake dialect's limitation
+    engine = create_engine("sqlite://", query_cache_size=0)
+    Registration.__table__.create(engine)
+    with Session(engine) as database:
+        seed(database, args.rows)
+        report(
+            f"Lookup by client ID ({args.rows} rows, SQLite)",
+            measure(
+                args.iterations,
+                compiled_per_call=lambda: database.query(Registration)
+                .filter_by(client_id="client_7")
+                .first(),
+                precompiled=lambda: query_registrations(
+                    database,
+                    select_by_client_id,
+                    client_id="client_7",
+                ).first(),
+            ),
+        )
+        report(
+            f"Page of 50 ({args.rows} rows, SQLite)",
+            measure(
+                args.iterations // 10,
+                compiled_per_call=lambda: database.query(Registration)
+                .order_by(Registration.created_at.desc())
+                .limit(50)
+                .offset(50)
+                .all(),
+                precompiled=lambda: query_registrations(
+                    database,
+                    select_page,
+                    limit=50,
+                    offset=50,
+                ).all(),
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
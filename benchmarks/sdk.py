@@ -0,0 +1,309 @@
+"""
+Measure the throughput, caller-side latency, and memory usage of the Python SDK
+when sending analytics events or registrations, to understand the cost that fides
+tools pay for instrumentation.
+
+Requests are sent to a local stub of the API server, running in a separate
+process, which waits for `--latency` seconds before responding, and fails the
+given fraction of requests with a `500` response. Each mode sends for the given
+`--duration`:
+
+- `send`: one event at a time, with the synchronous `AnalyticsClient.send`
+- `send_async`: one event at a time, awaiting `AnalyticsClient.send_async`
+- `send_async_concurrent`: up to `--concurrency` events at once, with
+  `AnalyticsClient.send_async`
+
+The `overhead` is the median latency added by the SDK, beyond that of the stub.
+Failed sends are counted rather than retried. Memory usage is read from /proc,
+so is only reported on Linux.
+
+Usage: python -m benchmarks.sdk [--duration 10] [--latency 0.005]
+    [--failure-rate 0] [--concurrency 50] [--kind event] [--modes send,send_async]
+    [--output FILE]
+"""
+
+import json
+import os
+import socket
+from argparse import ArgumentParser
+from asyncio import Semaphore, gather, run, sleep
+from datetime import datetime, timezone
+from multiprocessing import Process
+from random import random
+from time import perf_counter
+from time import sleep as time_sleep
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from aiohttp import web
+
+from fideslog.sdk.python.client import AnalyticsClient
+from fideslog.sdk.python.event import AnalyticsEvent
+from fideslog.sdk.python.exceptions import AnalyticsError
+from fideslog.sdk.python.registration import Registration
+
+Payload = Union[AnalyticsEvent, Registration]
+Mode = Callable[[AnalyticsClient, str, float, "Recorder"], None]
+
+
+def get_free_port() -> int:
+    """Return a port on which nothing is currently listening."""
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_stub_server(port: int, latency: float, failure_rate: float) -> None:
+    """
+    Serve `POST /events` and `POST /registrations`, responding after `latency`
+    seconds, and failing `failure_rate` of requests.
+    """
+
+    async def create(request: web.Request) -> web.Response:
+        await request.read()
+        await sleep(latency)
+        if random() < failure_rate:
+            return web.json_response({"error": "Internal server error"}, status=500)
+
+        return web.json_response({}, status=201)
+
+    app = web.Application()
+    app.router.add_post("/events", create)
+    app.router.add_post("/registrations", create)
+    web.run_app(app, host="127.0.0.1", port=port, print=lambda *_: None)
+
+
+def read_rss_bytes() -> Optional[int]:
+    """Return the resident memory of this process, if it can be read."""
+
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def build_payload(kind: str) -> Payload:
+    """Return a new event or registration, as a fides tool would."""
+
+    if kind == "registration":
+        return Registration("user@example.com", "Ethyca")
+
+    return AnalyticsEvent(
+        "cli_command_executed",
+        datetime.now(timezone.utc),
+        command="fidesctl apply",
+        docker=True,
+        flags=["--dry", "--diff"],
+        resource_counts={"datasets": 7, "policies": 26, "systems": 9},
+        status_code=0,
+    )
+
+
+def send_sync(client: AnalyticsClient, payload: Payload) -> None:
+    """Send `payload` with the synchronous API."""
+
+    if isinstance(payload, Registration):
+        client.register(payload)
+    else:
+        client.send(payload)
+
+
+class Recorder:
+    """Records the caller-side latency and outcome of each send."""
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.failures = 0
+
+    def record(self, started: float, error: Optional[Exception]) -> None:
+        """Record a send that began at `started`, and has just finished."""
+
+        self.latencies.append(perf_counter() - started)
+        if error is not None:
+            self.failures += 1
+
+
+def run_sync_mode(
+    client: AnalyticsClient,
+    kind: str,
+    duration: float,
+    recorder: Recorder,
+) -> None:
+    """Send one payload at a time, with the synchronous API."""
+
+    stop_at = perf_counter() + duration
+    while perf_counter() < stop_at:
+        started = perf_counter()
+        try:
+            send_sync(client, build_payload(kind))
+            recorder.record(started, None)
+        except AnalyticsError as err:
+            recorder.record(started, err)
+
+
+async def send_until(
+    client: AnalyticsClient,
+    kind: str,
+    stop_at: float,
+    recorder: Recorder,
+    semaphore: Semaphore,
+) -> None:
+    """Send payloads one at a time with the asynchronous API, until `stop_at`."""
+
+    while perf_counter() < stop_at:
+        async with semaphore:
+            started = perf_counter()
+            try:
+                await client.send_async(build_payload(kind))
+                recorder.record(started, None)
+            except AnalyticsError as err:
+                recorder.record(started, err)
+
+
+def run_async_mode(concurrency: int) -> Mode:
+    """Return a mode that sends up to `concurrency` payloads at once."""
+
+    def run_mode(
+        client: AnalyticsClient,
+        kind: str,
+        duration: float,
+        recorder: Recorder,
+    ) -> None:
+        async def send_all() -> None:
+            stop_at = perf_counter() + duration
+            semaphore = Semaphore(concurrency)
+            senders: List[Awaitable[None]] = [
+                send_until(client, kind, stop_at, recorder, semaphore)
+                for _ in range(concurrency)
+            ]
+            await gather(*senders)
+
+        run(send_all())
+
+    return run_mode
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the value at `fraction` of `sorted_values`, by nearest rank."""
+
+    if not sorted_values:
+        return 0.0
+
+    return sorted_values[
+        min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    ]
+
+
+def measure(
+    mode: Mode,
+    client: AnalyticsClient,
+    kind: str,
+    duration: float,
+    server_latency: float,
+) -> Dict[str, object]:
+    """
+    Run `mode` for `duration` seconds, and summarize its performance. The
+    overhead is the median latency beyond that of the server.
+    """
+
+    recorder = Recorder()
+    rss_before = read_rss_bytes()
+    started = perf_counter()
+    mode(client, kind, duration, recorder)
+    elapsed = perf_counter() - started
+    rss_after = read_rss_bytes()
+
+    latencies = sorted(recorder.latencies)
+    summary: Dict[str, object] = {
+        "sent": len(latencies),
+        "failed": recorder.failures,
+        "per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.5) * 1e3, 3),
+            "p95": round(percentile(latencies, 0.95) * 1e3, 3),
+            "p99": round(percentile(latencies, 0.99) * 1e3, 3),
+            "overhead": round((percentile(latencies, 0.5) - server_latency) * 1e3, 3),
+        },
+    }
+    if rss_before is not None and rss_after is not None:
+        summary["rss_mb"] = round(rss_after / 1024**2, 1)
+        summary["rss_growth_mb"] = round((rss_after - rss_before) / 1024**2, 1)
+
+    return summary
+
+
+def wait_until_listening(port: int, timeout: float = 10) -> None:
+    """Wait for the stub server to accept connections."""
+
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time_sleep(0.05)
+
+    raise TimeoutError(f"The stub server did not start within {timeout}s")
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--kind", choices=["event", "registration"], default="event")
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--modes", default="send,send_async,send_async_concurrent")
+    parser.add_argument("--output", help="A file to which to write the results as JSON")
+    args = parser.parse_args()
+
+    modes: Dict[str, Mode] = {
+        "send": run_sync_mode,
+        "send_async": run_async_mode(1),
+        "send_async_concurrent": run_async_mode(args.concurrency),
+    }
+    unknown = set(args.modes.split(",")) - set(modes)
+    if unknown:
+        parser.error(f"Unknown modes: {', '.join(sorted(unknown))}")
+
+    port = get_free_port()
+    stub = Process(
+        target=run_stub_server,
+        args=(port, args.latency, args.failure_rate),
+        daemon=True,
+    )
+    stub.start()
+
+    client = AnalyticsClient("benchmark_client_id", "Linux", "fidesctl", "1.2.3")
+    client.server_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_listening(port)
+        results = {
+            "kind": args.kind,
+            "latency": args.latency,
+            "failure_rate": args.failure_rate,
+            "modes": {
+                name: measure(
+                    modes[name],
+                    client,
+                    args.kind,
+                    args.duration,
+                    args.latency,
+                )
+                for name in args.modes.split(",")
+            },
+        }
+    finally:
+        stub.terminate()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
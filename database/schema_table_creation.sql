@@ -49,10 +49,14 @@ create table if not exists registrations (
   id integer,
   client_id varchar,
   email varchar,
+  email_index varchar, -- keyed HMAC of the normalized email, for exact-match lookups
   organization varchar,
   created_at timestamp_tz,
   updated_at timestamp_tz
 );
 
+-- Existing registrations are indexed by: python -m fideslog.api.backfill_email_index
+alter table registrations add column if not exists email_index varchar;
+
 
 show tables in schema raw.fides;
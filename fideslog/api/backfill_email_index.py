@@ -0,0 +1,41 @@
+"""
+Store the email index of registrations created before the `EMAIL_INDEX` column
+was added, so that `GET /registrations?email=` can find them. Registrations
+without an index are decrypted and updated in batches, and the command can be
+run again to resume an interrupted backfill, or to index registrations created
+by servers that were not yet upgraded.
+
+The database configuration is loaded as it would be by the API server, so the
+connection options, and the `encryption_key` and `blind_index_key` in use,
+must be set.
+
+Usage: python -m fideslog.api.backfill_email_index [--batch-size 500]
+"""
+
+from argparse import ArgumentParser
+
+from fideslog.api.database import SessionLocal, get_engine
+from fideslog.api.database.registrations import EXPORT_BATCH_SIZE, backfill_email_index
+
+
+def main() -> None:
+    """Run the backfill."""
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size",
+        default=EXPORT_BATCH_SIZE,
+        help="The number of registrations to update per transaction",
+        type=int,
+    )
+    args = parser.parse_args()
+
+    get_engine()
+    with SessionLocal() as database:
+        updated = backfill_email_index(database, args.batch_size)
+
+    print(f"Backfilled the email index of {updated} registration(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# pylint: disable=import-outside-toplevel
+
+from asyncio import Future, get_running_loop, shield
+from collections import OrderedDict
+from functools import partial
+from hashlib import blake2b
+from logging import getLogger
+from threading import Lock
+from time import monotonic
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import CacheSettings, config
+
+log = getLogger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    """A serialized response body, and the entity tag identifying it."""
+
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "CachedResponse":
+        """
+        Derive the entity tag from the content of `body`, so that equal
+        responses share an entity tag regardless of which server produced them.
+        """
+
+        return cls(body, f'"{blake2b(body, digest_size=16).hexdigest()}"')
+
+    @classmethod
+    def decode(cls, value: bytes) -> "CachedResponse":
+        """Reverse the encoding applied by `encode`."""
+
+        etag, body = value.split(b"\n", maxsplit=1)
+        return cls(body, etag.decode())
+
+    def encode(self) -> bytes:
+        """Combine the entity tag and body into a single value to be stored."""
+
+        return self.etag.encode() + b"\n" + self.body
+
+
+class CacheBackend:
+    """
+    The storage used by a `ResponseCache`. Subclasses must implement
+    `get`, `set`, and `clear`.
+    """
+
+    # Whether calls may wait on the network, and so must not be made on the event loop
+    blocking = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the unexpired value stored for `key`, if one exists."""
+
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store `value` for `key`, for `ttl` seconds."""
+
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove all stored values."""
+
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Stores values in the current process, evicting the least recently
+    used value once `max_entries` are stored.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self.lock:
+            self.entries[key] = (monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+class RedisBackend(CacheBackend):
+    """
+    Stores values in a Redis server, to be shared between processes.
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "fideslog:cache:") -> None:
+        from redis import Redis
+
+        self.client = Redis.from_url(url, socket_timeout=1)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class ResponseCache:
+    """
+    Caches serialized responses for `ttl` seconds. Concurrent requests for the
+    same uncached key share a single load.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.generation = 0
+        self.in_flight: Dict[Tuple[int, str], "Future[CachedResponse]"] = {}
+        self.clearing: "Optional[Future[None]]" = None
+
+    async def get_or_load(
+        self,
+        key: str,
+        load: Callable[[], Awaitable[bytes]],
+    ) -> CachedResponse:
+        """
+        Return the cached response for `key`, calling `load` to produce
+        the response body if none is cached.
+        """
+
+        if self.clearing is not None and not self.clearing.done():
+            # Don't return a response cached before the last invalidation
+            await shield(self.clearing)
+
+        cached = (
+            await self.call_backend(partial(self.backend.get, key))
+            if self.ttl
+            else None
+        )
+        if cached is not None:
+            return CachedResponse.decode(cached)
+
+        generation = self.generation
+        in_flight = self.in_flight.get((generation, key))
+        if in_flight is not None:
+            return await shield(in_flight)
+
+        future: "Future[CachedResponse]" = get_running_loop().create_future()
+        self.in_flight[(generation, key)] = future
+        try:
+            response = CachedResponse.from_body(await load())
+        except Exception as err:
+            future.set_exception(err)
+            future.exception()  # Mark as retrieved, in case no other request is waiting
+            raise
+        finally:
+            del self.in_flight[(generation, key)]
+
+        future.set_result(response)
+
+        # Avoid storing a response loaded before the cache was last invalidated
+        if self.ttl and generation == self.generation:
+            await self.call_backend(
+                partial(self.backend.set, key, response.encode(), self.ttl)
+            )
+
+        return response
+
+    def invalidate(self) -> None:
+        """
+        Discard all cached responses. This is called once a change has been
+        committed, so a failure to clear the backend is logged rather than
+        failing the request, and stale responses expire after the TTL.
+
+        When called on the event loop, a blocking backend is cleared in a
+        worker thread, and requests wait for it to finish before reading
+        from the backend.
+        """
+
+        log.debug("Invalidating cached responses")
+        self.generation += 1
+        if not self.backend.blocking:
+            self.clear_backend()
+            return
+
+        try:
+            loop = get_running_loop()
+        except RuntimeError:
+            # Already in a worker thread, such as a synchronous route's
+            self.clear_backend()
+            return
+
+        self.clearing = loop.run_in_executor(None, self.clear_backend)
+
+    def clear_backend(self) -> None:
+        """Remove all values from the backend, logging any failure to do so."""
+
+        try:
+            self.backend.clear()
+        except Exception as err:  # pylint: disable=broad-except
+            log.warning("Failed to clear cached responses: %s", err)
+
+    async def call_backend(
+        self, call: Callable[[], Optional[bytes]]
+    ) -> Optional[bytes]:
+        """
+        Call a backend method, without blocking the event loop if it may wait.
+        The cache is an optimization, so if the backend is unavailable the
+        failure is logged, and `None` is returned as if nothing was cached.
+        """
+
+        try:
+            if self.backend.blocking:
+                return await run_in_threadpool(call)
+
+            return call()
+        except Exception as err:  # pylint: disable=broad-except
+            log.warning("Failed to use the response cache: %s", err)
+            return None
+
+
+def get_cache_backend(settings: CacheSettings) -> CacheBackend:
+    """
+    Return the shared backend if one is configured, otherwise an in-process backend.
+    """
+
+    if settings.backend_url:
+        return RedisBackend(settings.backend_url)
+
+    return MemoryBackend(settings.max_entries)
+
+
+registration_cache = ResponseCache(get_cache_backend(config.cache), config.cache.ttl)
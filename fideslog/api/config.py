@@ -1,12 +1,11 @@
-# pylint: disable= no-self-argument, no-self-use
+# pylint: disable= import-outside-toplevel, no-self-argument, no-self-use
 
 import logging
 import os
-from typing import Optional, Tuple, Union
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 from pydantic import BaseSettings, Field, validator
 from pydantic.env_settings import SettingsSourceCallable
-from snowflake.sqlalchemy import URL
 from toml import load
 
 from .logger import LOG_ENTRY_FORMAT, get_fideslog_logger
@@ -14,6 +13,7 @@ from .logger import LOG_ENTRY_FORMAT, get_fideslog_logger
 ENV_PREFIX = "FIDESLOG__"
 CONFIG_FILE_NAME = "fideslog.toml"
 CONFIG_PATH_VAR = f"{ENV_PREFIX}CONFIG_PATH"
+METRICS_DIR_VAR = f"{ENV_PREFIX}METRICS_DIR"
 
 logging.basicConfig(format=LOG_ENTRY_FORMAT, level=logging.DEBUG)
 log = logging.getLogger(__name__)
@@ -50,6 +50,7 @@ class StorageSettings(Settings):
     aws_secret_access_key: Optional[str] = Field(None, exclude=True)
     aws_access_key_id: Optional[str] = Field(None, exclude=True)
     bucket_name: str = Field(..., exclude=True)
+    endpoint_url: Optional[str] = None
 
     class Config:
         """Modifies pydantic behavior."""
@@ -57,42 +58,86 @@ class StorageSettings(Settings):
         env_prefix = f"{ENV_PREFIX}STORAGE_"
 
 
+class CacheSettings(Settings):
+    """Configuration options for caching API responses and validation results."""
+
+    backend_url: Optional[str] = Field(None, exclude=True)
+    endpoint_max_entries: int = Field(1024, ge=0)
+    max_entries: int = Field(256, ge=1)
+    ttl: int = Field(60, ge=0)
+
+    class Config:
+        """Modifies pydantic behavior."""
+
+        env_prefix = f"{ENV_PREFIX}CACHE_"
+
+
 class DatabaseSettings(Settings):
-    """Configuration options for Snowflake."""
+    """
+    Configuration options for Snowflake. The credentials are only
+    required to serve requests that access the database.
+    """
 
-    account: str = Field(..., exclude=True)
+    account: Optional[str] = Field(None, exclude=True)
+    blind_index_key: str = Field("fides", exclude=True)
     database: str = "raw"
     db_schema: str = "fides"
     encryption_key: str = Field("fides", exclude=True)
-    password: str = Field(..., exclude=True)
+    password: Optional[str] = Field(None, exclude=True)
+    pool_max_overflow: int = Field(10, ge=0)
+    pool_ping_interval: int = Field(0, ge=0)
+    pool_pre_ping: bool = True
+    pool_recycle: int = Field(3600, ge=-1)
+    pool_size: int = Field(5, ge=1)
+    pool_warm_up: int = Field(0, ge=0)
     role: str = "event_writer"
-    user: str = Field(..., exclude=True)
+    user: Optional[str] = Field(None, exclude=True)
     warehouse: str = "fides_log"
 
     db_connection_uri: Optional[str] = Field(None, exclude=True)
 
-    @validator("db_connection_uri", pre=True, always=True)
-    def assemble_db_connection_uri(
-        cls,
-        value: Optional[str],
-        values: dict[str, str],
-    ) -> str:
+    @validator("pool_warm_up")
+    def check_pool_warm_up(cls, value: int, values: Dict[str, int]) -> int:
         """
-        Ensures a valid connection string is built from the provided details.
+        Ensure that no more connections are opened at startup than the pool
+        keeps. Overflow connections are closed as soon as they are returned,
+        and waiting for them beyond `pool_max_overflow` times out.
         """
 
-        return (
-            value
-            if isinstance(value, str)
-            else URL(
-                account=values["account"],
-                database=values["database"],
-                password=values["password"],
-                role=values["role"],
-                schema=values["db_schema"],
-                warehouse=values["warehouse"],
-                user=values["user"],
-            )
+        pool_size = values.get("pool_size")
+        assert (
+            pool_size is None or value <= pool_size
+        ), "pool_warm_up must not be greater than pool_size"
+        return value
+
+    def get_connection_uri(self) -> str:
+        """
+        Return the provided `db_connection_uri`, or build one from the
+        provided details.
+
+        The Snowflake dialect is slow to import, so it is only imported
+        once a connection string is needed.
+        """
+
+        if self.db_connection_uri:
+            return self.db_connection_uri
+
+        missing = [
+            name for name in ("account", "password", "user") if not getattr(self, name)
+        ]
+        if missing:
+            raise ValueError(f"Missing database configuration: {', '.join(missing)}")
+
+        from snowflake.sqlalchemy import URL
+
+        return URL(
+            account=self.account,
+            database=self.database,
+            password=self.password,
+            role=self.role,
+            schema=self.db_schema,
+            warehouse=self.warehouse,
+            user=self.user,
         )
 
     class Config:
@@ -101,11 +146,27 @@ class DatabaseSettings(Settings):
         env_prefix = f"{ENV_PREFIX}DATABASE_"
 
 
+class EventSettings(Settings):
+    """Configuration options for storing analytics events."""
+
+    endpoint_routes: Dict[str, List[str]] = {}
+    response_mode: Literal["accepted", "event"] = "event"
+    template_endpoints: bool = False
+
+    class Config:
+        """Modifies pydantic behavior."""
+
+        env_prefix = f"{ENV_PREFIX}EVENTS_"
+
+
 class LoggingSettings(Settings):
     """Configuration options for API server logging."""
 
     destination: str = Field("stdout", min_length=1)
+    format: Literal["json", "text"] = "text"
     level: str = Field(logging.getLevelName(logging.INFO), min_length=4, max_length=8)
+    queue_size: int = Field(10000, ge=1)
+    request_sample_rate: float = Field(1, ge=0, le=1)
 
     destination_type: Optional[str] = Field(None, exclude=True)
     logger: Optional[logging.Logger] = Field(None, exclude=True)
@@ -159,6 +220,8 @@ class LoggingSettings(Settings):
                 values["level"],
                 values["destination"],
                 values["destination_type"],
+                values["format"],
+                int(values["queue_size"]),
             )
         )
 
@@ -182,10 +245,22 @@ class SecuritySettings(Settings):
 class ServerSettings(Settings):
     """Configuration options for the API server."""
 
+    backlog: int = Field(2048, ge=1)
     host: str = "localhost"
     hot_reload: bool = False
+    http: Literal["auto", "h11", "httptools"] = "auto"
+    ip_rate_limit: str = "1000/minute"
+    json_encoder: Literal["auto", "orjson", "stdlib"] = "auto"
+    keep_alive_timeout: int = Field(5, ge=0)
+    loop: Literal["auto", "asyncio", "uvloop"] = "auto"
     port: int = 8080
+    rate_limit_store_url: Optional[str] = Field(None, exclude=True)
+    rate_limit_key: Literal["client_id", "ip"] = "ip"
+    rate_limit_max_keys: int = Field(10000, ge=1)
+    rate_limit_sync_delay: float = Field(1, gt=0)
     request_rate_limit: str = "100/minute"
+    route_rate_limits: Dict[str, str] = {}
+    workers: int = Field(1, ge=1)
 
     class Config:
         """Modifies pydantic behavior."""
@@ -193,14 +268,28 @@ class ServerSettings(Settings):
         env_prefix = f"{ENV_PREFIX}SERVER_"
 
 
+class TracingSettings(Settings):
+    """Configuration options for tracing the handling of requests."""
+
+    destination: Optional[str] = None
+
+    class Config:
+        """Modifies pydantic behavior."""
+
+        env_prefix = f"{ENV_PREFIX}TRACING_"
+
+
 class FideslogSettings(Settings):
     """Configuration options for fideslog."""
 
+    cache: CacheSettings = CacheSettings()
     database: DatabaseSettings
+    events: EventSettings = EventSettings()
     logging: LoggingSettings
     security: SecuritySettings = SecuritySettings()
     server: ServerSettings
     storage: StorageSettings = StorageSettings()
+    tracing: TracingSettings = TracingSettings()
 
 
 def load_file(filename: str) -> dict[str, Union[str, int, bool]]:
@@ -259,10 +348,13 @@ def get_config() -> FideslogSettings:
             "Loading configuration from environment variables and default values..."
         )
         settings = FideslogSettings(
+            cache=CacheSettings(),
             database=DatabaseSettings(),
+            events=EventSettings(),
             logging=LoggingSettings(),
             server=ServerSettings(),
             storage=StorageSettings(),
+            tracing=TracingSettings(),
         )
 
     log.info("Configuration in use: %s", settings.json())
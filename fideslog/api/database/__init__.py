@@ -1,30 +1,93 @@
 import logging
-from typing import Generator
+from asyncio import sleep
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Generator, List, Optional
 
 from boto3 import Session as aws_session
-from snowflake.sqlalchemy.snowdialect import SnowflakeDialect
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
 
 from ..config import config
+from ..errors import ServiceUnavailableError
+
+log = logging.getLogger(__name__)
 
 # Suppress a ton of log output
 logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
 
-# See: https://github.com/snowflakedb/snowflake-sqlalchemy/issues/265#issuecomment-1026632843
-SnowflakeDialect.supports_statement_cache = False
+# Created on first use, so that serving `/events` alone requires neither the
+# database credentials nor the time taken to import the Snowflake dialect
+engine: Optional[Engine] = None
+engine_lock = Lock()
 
-engine = create_engine(config.database.db_connection_uri, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
 
+def get_engine() -> Engine:
+    """
+    Return the database engine, creating it if it does not yet exist.
+    """
+
+    global engine  # pylint: disable=global-statement
+
+    with engine_lock:
+        if engine is None:
+            # pylint: disable=import-outside-toplevel
+            from snowflake.sqlalchemy.snowdialect import SnowflakeDialect
+
+            # See: https://github.com/snowflakedb/snowflake-sqlalchemy/issues/265#issuecomment-1026632843
+            SnowflakeDialect.supports_statement_cache = False
+
+            uri = config.database.get_connection_uri()
+            engine = create_engine(
+                uri,
+                # SQLite is supported for local development and benchmarks. Its
+                # connections are pooled and shared between request threads
+                # like any other database's.
+                connect_args=(
+                    {"check_same_thread": False} if uri.startswith("sqlite") else {}
+                ),
+                max_overflow=config.database.pool_max_overflow,
+                # Idle connections checked in the background don't also need
+                # to be checked on every checkout
+                pool_pre_ping=config.database.pool_pre_ping
+                and config.database.pool_ping_interval == 0,
+                pool_recycle=config.database.pool_recycle,
+                pool_size=config.database.pool_size,
+                poolclass=QueuePool,
+            )
+            SessionLocal.configure(bind=engine)
+
+        return engine
+
+
+def dispose_engine() -> None:
+    """
+    Close all pooled database connections, if the engine has been created.
+    """
+
+    if engine is not None:
+        engine.dispose()
+
+
 def get_db() -> Session:
     """
-    Return a database session.
+    Return a database session. If the database connection is not configured,
+    the request fails with a `503` response.
     """
 
+    try:
+        get_engine()
+    except ValueError as err:
+        raise ServiceUnavailableError(err) from err
+
     database = SessionLocal()
     try:
         yield database
@@ -38,3 +101,67 @@ def get_storage() -> Generator:
     """
 
     yield aws_session()
+
+
+def warm_up_pool(size: int) -> None:
+    """
+    Open `size` database connections in parallel and return them to the pool,
+    so that the first requests served do not wait on new database logins.
+    """
+
+    if size < 1:
+        return
+
+    log.info("Opening %s database connection(s)...", size)
+    pool_engine = get_engine()
+    with ThreadPoolExecutor(max_workers=size) as executor:
+        futures = [executor.submit(pool_engine.connect) for _ in range(size)]
+
+    connections: List[Connection] = []
+    try:
+        for future in futures:
+            try:
+                connections.append(future.result())
+            except SQLAlchemyError as err:
+                log.warning("Failed to open a database connection: %s", err)
+    finally:
+        for connection in connections:
+            connection.close()
+
+    log.info("Opened %s database connection(s)", len(connections))
+
+
+def ping_idle_connections() -> None:
+    """
+    Check that each connection currently idle in the pool is still alive,
+    discarding any that are not.
+
+    The pool is first-in, first-out, so checking out and returning the same
+    number of connections as are idle visits each of them once. Nothing is
+    checked until the engine has been created.
+    """
+
+    if engine is None:
+        return
+
+    for _ in range(engine.pool.checkedin()):
+        connection = engine.pool.connect()
+        try:
+            if not engine.dialect.do_ping(connection.dbapi_connection):
+                connection.invalidate()
+        except Exception as err:  # pylint: disable=broad-except
+            log.debug("Discarding an unusable database connection: %s", err)
+            connection.invalidate()
+        finally:
+            connection.close()
+
+
+async def check_pool_liveness(interval: int) -> None:
+    """
+    Ping idle database connections every `interval` seconds, without
+    blocking the event loop.
+    """
+
+    while True:
+        await sleep(interval)
+        await run_in_threadpool(ping_idle_connections)
@@ -1,5 +1,6 @@
 import csv
 from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
 from uuid import uuid1
 
 from fideslog.api.schemas.analytics_event import AnalyticsEvent
@@ -20,6 +21,19 @@ class Pipe:
         self.value = self.value + text
 
 
+class Echo:
+    """
+    Class that imitates a file object in write mode
+    Returns each written line instead of storing it, for use with streamed responses
+    """
+
+    def write(self, text: str) -> str:
+        """
+        Returns the text to be sent as a line of csv
+        """
+        return text
+
+
 def file_name_random() -> str:
     """
     Generates a random uuid to be passed as the filename
@@ -37,3 +51,17 @@ def write_csv_object(event: AnalyticsEvent) -> str:
     writer.writerow(event.dict())
 
     return pipe.value
+
+
+def stream_csv_rows(
+    fieldnames: List[str],
+    rows: Iterable[Dict[str, Optional[str]]],
+) -> Iterator[str]:
+    """
+    Lazily writes out a csv header, followed by a line per row
+    """
+    writer = csv.DictWriter(Echo(), fieldnames)
+    yield writer.writeheader()
+
+    for row in rows:
+        yield writer.writerow(row)
@@ -0,0 +1,64 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Tuple
+
+ID_TEMPLATE = "{id}"
+
+# A path segment that identifies a resource, rather than naming a route: a UUID or
+# long hexadecimal string (optionally prefixed, as in `pri_<uuid>`), or a number
+ID_SEGMENT = re.compile(
+    r"(?<=/)(?:(?:[A-Za-z]+_)?(?:[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?"
+    r"[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}|[0-9a-fA-F]{16,})|[0-9]+)(?=/|$)"
+)
+PARAMETER = re.compile(r"{[^/{}]*}")
+
+
+def compile_routes(routes: List[str]) -> Tuple[Pattern[str], List[str]]:
+    """
+    Compile route templates, such as `/api/v1/policy/{policy_key}`, into a single
+    pattern matching any of them, in which the group index of each template's
+    alternative is its index in the returned list, plus one.
+
+    Templates with fewer parameters are tried first, so that a fixed path such
+    as `/api/v1/policy/rules` takes priority over `/api/v1/policy/{policy_key}`.
+    """
+
+    ordered = sorted(set(routes), key=lambda route: len(PARAMETER.findall(route)))
+    alternatives = (
+        "("
+        + "[^/]+".join(re.escape(part) for part in PARAMETER.split(route.rstrip("/")))
+        + ")"
+        for route in ordered
+    )
+    return re.compile(f"(?:{'|'.join(alternatives)})/?"), ordered
+
+
+class EndpointTemplates:
+    """
+    Replaces the identifiers in endpoint paths with placeholders, so that all
+    requests to the same API route are stored with the same endpoint.
+
+    Paths matching one of the known routes of the event's product are replaced
+    by that route. Otherwise, each segment that looks like an identifier is
+    replaced with `{id}`. The results for the `max_entries` most recently seen
+    paths are cached.
+    """
+
+    def __init__(self, routes: Dict[str, List[str]], max_entries: int) -> None:
+        self.routes = {
+            product_name: compile_routes(product_routes)
+            for product_name, product_routes in routes.items()
+            if product_routes
+        }
+        self.template = lru_cache(maxsize=max_entries)(self.find_template)
+
+    def find_template(self, path: str, product_name: Optional[str]) -> str:
+        """Return the template for `path`, without using the cache."""
+
+        if product_name in self.routes:
+            pattern, ordered = self.routes[product_name]
+            match = pattern.fullmatch(path)
+            if match and match.lastindex:
+                return ordered[match.lastindex - 1]
+
+        return ID_SEGMENT.sub(ID_TEMPLATE, path)
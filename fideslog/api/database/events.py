@@ -3,15 +3,24 @@ from logging import getLogger
 from typing import Optional
 from urllib.parse import urlparse
 
+from botocore.exceptions import BotoCoreError, ClientError
 from mypy_boto3_s3.client import S3Client
 
+from fideslog.api.config import config
 from fideslog.api.database.csv_writer import file_name_random, write_csv_object
+from fideslog.api.database.endpoint_templates import EndpointTemplates
+from fideslog.api.metrics import EVENT_SIZE, STORAGE_ERRORS
 from fideslog.api.schemas.analytics_event import AnalyticsEvent
+from fideslog.api.tracing import span
 
 EXCLUDED_ATTRIBUTES = set(("client_id", "endpoint", "extra_data", "os"))
 
 
 log = getLogger(__name__)
+endpoint_templates = EndpointTemplates(
+    config.events.endpoint_routes,
+    config.cache.endpoint_max_entries,
+)
 
 
 def create(client: S3Client, bucket: str, event: AnalyticsEvent) -> None:
@@ -23,25 +32,56 @@ def create(client: S3Client, bucket: str, event: AnalyticsEvent) -> None:
         "The following attributes have been excluded as PII: %s", EXCLUDED_ATTRIBUTES
     )
 
-    event.endpoint = truncate_endpoint_url(event.endpoint)
+    with span("encode") as attributes:
+        if event.endpoint is not None:
+            # The event is returned in the response, so is left unchanged
+            endpoint = truncate_endpoint_url(event.endpoint, event.product_name)
+            event = event.copy(update={"endpoint": endpoint})
+
+        body = write_csv_object(event).encode()
+        attributes["bytes"] = len(body)
+
+    EVENT_SIZE.observe(len(body))
 
     date_dir = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
     new_file = file_name_random()
 
-    client.put_object(
-        Bucket=bucket,
-        Key=f"{date_dir}/{new_file}",
-        Body=write_csv_object(event),
-        ContentType="text/csv",
-    )
+    with span("put_object"):
+        try:
+            client.put_object(
+                Bucket=bucket,
+                Key=f"{date_dir}/{new_file}",
+                Body=body,
+                ContentType="text/csv",
+            )
+        except (BotoCoreError, ClientError) as err:
+            STORAGE_ERRORS.inc(get_error_code(err))
+            raise
 
     log.debug("Event created: %s", logged_event)
 
 
-def truncate_endpoint_url(endpoint: Optional[str]) -> Optional[str]:
+def get_error_code(err: Exception) -> str:
+    """
+    Return the error code included in the storage service's response, or
+    the type of the error if no response was received.
+    """
+
+    if isinstance(err, ClientError):
+        return err.response.get("Error", {}).get("Code", "Unknown")
+
+    return type(err).__name__
+
+
+def truncate_endpoint_url(
+    endpoint: Optional[str],
+    product_name: Optional[str] = None,
+) -> Optional[str]:
     """
-    Guarantee that only the endpoint path is stored in the database.
+    Guarantee that only the endpoint path is stored in the database. If
+    enabled, the path is replaced by its route template, using the known
+    routes of `product_name`.
     """
 
     if endpoint is None:
@@ -49,5 +89,8 @@ def truncate_endpoint_url(endpoint: Optional[str]) -> Optional[str]:
 
     endpoint_components = endpoint.split(":", maxsplit=1)
     http_method = endpoint_components[0].strip().upper()
-    url = endpoint_components[1].strip()
-    return f"{http_method}: {urlparse(url).path}"
+    path = urlparse(endpoint_components[1].strip()).path
+    if config.events.template_endpoints:
+        path = endpoint_templates.template(path, product_name)
+
+    return f"{http_method}: {path}"
@@ -1,30 +1,192 @@
 from datetime import datetime, timezone
+from hashlib import sha256
+from hmac import new as new_hmac
 from logging import getLogger
+from typing import Dict, Iterator, Optional, Union
 
+from fastapi_pagination import create_page
 from fastapi_pagination.bases import AbstractPage, AbstractParams
-from fastapi_pagination.ext.sqlalchemy import paginate
+from sqlalchemy import bindparam, func, select
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import Select
 
+from ..cache import registration_cache
+from ..config import config
 from ..models.models import Registration as RegistrationORM
 from ..schemas.registration import Registration
+from .statements import StatementBuilder, precompiled
+
+EXPORT_BATCH_SIZE = 500
 
 log = getLogger(__name__)
 
 
+def email_blind_index(email: str) -> str:
+    """
+    Return a deterministic, keyed digest of an email address.
+
+    The `EMAIL` column is encrypted with a random nonce, so equal addresses
+    never produce equal ciphertexts. This digest is stored alongside it to
+    allow exact-match lookups without decrypting every row.
+    """
+
+    return new_hmac(
+        config.database.blind_index_key.encode(),
+        email.strip().lower().encode(),
+        sha256,
+    ).hexdigest()
+
+
+def select_all() -> Select:
+    """All registrations, most recent first."""
+
+    return select(RegistrationORM).order_by(RegistrationORM.created_at.desc())
+
+
+def select_page() -> Select:
+    """A page of registrations, most recent first."""
+
+    return select_all().limit(bindparam("limit")).offset(bindparam("offset"))
+
+
+def select_page_by_email() -> Select:
+    """A page of registrations with a given email address, most recent first."""
+
+    return select_page().where(RegistrationORM.email_index == bindparam("email_index"))
+
+
+def select_by_client_id() -> Select:
+    """The registration for a given client."""
+
+    return (
+        select(RegistrationORM)
+        .where(RegistrationORM.client_id == bindparam("client_id"))
+        .limit(1)
+    )
+
+
+def select_unindexed() -> Select:
+    """A batch of registrations with an email address, but no email index."""
+
+    return (
+        select(RegistrationORM)
+        .where(RegistrationORM.email_index.is_(None))
+        .where(RegistrationORM.email.is_not(None))
+        .limit(bindparam("limit"))
+    )
+
+
+def count_all() -> Select:
+    """The number of registrations."""
+
+    return select(func.count().label("count")).select_from(RegistrationORM)
+
+
+def count_by_email() -> Select:
+    """The number of registrations with a given email address."""
+
+    return count_all().where(RegistrationORM.email_index == bindparam("email_index"))
+
+
+def query_registrations(
+    database: Session,
+    build_statement: StatementBuilder,
+    **params: object,
+) -> Query:
+    """
+    Return a query for the registrations selected by a precompiled statement.
+    """
+
+    return (
+        database.query(RegistrationORM)
+        .from_statement(precompiled(build_statement, database.get_bind().dialect))
+        .params(**params)
+    )
+
+
 def get(
     database: Session,
     pagination_params: AbstractParams,
+    email: Optional[str] = None,
 ) -> AbstractPage[RegistrationORM]:
     """
-    Return existing registrations.
+    Return existing registrations, optionally only those matching `email`.
     """
 
     log.debug("Fetching registrations")
-    return paginate(
-        database.query(RegistrationORM).order_by(RegistrationORM.created_at.desc()),
-        params=pagination_params,
-    )
+    dialect = database.get_bind().dialect
+    raw_params = pagination_params.to_raw_params()
+    page_params: Dict[str, Union[int, str]] = {
+        "limit": raw_params.limit,
+        "offset": raw_params.offset,
+    }
+
+    if email is None:
+        count_statement = precompiled(count_all, dialect)
+        items = query_registrations(database, select_page, **page_params).all()
+    else:
+        page_params["email_index"] = email_blind_index(email)
+        count_statement = precompiled(count_by_email, dialect)
+        items = query_registrations(
+            database,
+            select_page_by_email,
+            **page_params,
+        ).all()
+
+    total = database.execute(count_statement, page_params).scalar_one()
+    return create_page(items, total, pagination_params)
+
+
+def export(database: Session) -> Iterator[RegistrationORM]:
+    """
+    Return an iterator over all existing registrations.
+
+    Rows are fetched from a server-side cursor in batches of `EXPORT_BATCH_SIZE`,
+    so memory use remains constant regardless of the size of the table. The
+    query is executed immediately, so that database errors are raised here
+    rather than while the results are being consumed.
+    """
+
+    log.debug("Exporting registrations")
+    return iter(query_registrations(database, select_all).yield_per(EXPORT_BATCH_SIZE))
+
+
+def backfill_email_index(
+    database: Session,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> int:
+    """
+    Store the email index of each registration created before the index was
+    introduced, so that it can be found by email address. Returns the number
+    of registrations updated.
+
+    Registrations are updated and committed `batch_size` at a time, so that an
+    interrupted backfill can be resumed by running it again.
+    """
+
+    log.debug("Backfilling the email index of registrations")
+    updated = 0
+    while True:
+        records = query_registrations(
+            database,
+            select_unindexed,
+            limit=batch_size,
+        ).all()
+        if not records:
+            break
+
+        for record in records:
+            record.email_index = email_blind_index(record.email)
+
+        database.commit()
+        updated += len(records)
+        log.info("Backfilled the email index of %s registration(s)", updated)
+
+    if updated:
+        registration_cache.invalidate()
+
+    return updated
 
 
 def create(database: Session, registration: Registration) -> None:
@@ -37,6 +199,7 @@ def create(database: Session, registration: Registration) -> None:
         RegistrationORM(
             client_id=registration.client_id,
             email=registration.email,
+            email_index=email_blind_index(registration.email),
             organization=registration.organization,
             created_at=registration.created_at,
             updated_at=registration.updated_at,
@@ -44,6 +207,7 @@ def create(database: Session, registration: Registration) -> None:
     )
 
     database.commit()
+    registration_cache.invalidate()
     log.debug(
         "Successfully created registration for client with ID: %s",
         registration.client_id,
@@ -59,19 +223,21 @@ def update(
     """
 
     log.debug("Updating registration for client with ID: %s", registration.client_id)
-    record = (
-        database.query(RegistrationORM)
-        .filter_by(client_id=registration.client_id)
-        .first()
-    )
+    record = query_registrations(
+        database,
+        select_by_client_id,
+        client_id=registration.client_id,
+    ).first()
     if record is None:
         raise NoResultFound
 
     record.email = registration.email
+    record.email_index = email_blind_index(registration.email)
     record.organization = registration.organization
     record.updated_at = datetime.now(timezone.utc)
 
     database.commit()
+    registration_cache.invalidate()
     log.debug("Updated registration for client with ID: %s", registration.client_id)
 
     return record
@@ -84,8 +250,13 @@ def delete(database: Session, client_id: str) -> None:
 
     log.debug("Deleting registration for client with ID: %s", client_id)
 
-    record = database.query(RegistrationORM).filter_by(client_id=client_id).first()
+    record = query_registrations(
+        database,
+        select_by_client_id,
+        client_id=client_id,
+    ).first()
     database.delete(record)
     database.commit()
+    registration_cache.invalidate()
 
     log.debug("Deleted registration for client with ID: %s", client_id)
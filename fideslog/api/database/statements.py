@@ -0,0 +1,46 @@
+from logging import getLogger
+from typing import Callable, Dict, Tuple, Type
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Dialect
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import TextualSelect
+
+StatementBuilder = Callable[[], Select]
+
+log = getLogger(__name__)
+
+_statements: Dict[Tuple[StatementBuilder, Type[Dialect]], TextualSelect] = {}
+
+
+def precompiled(build_statement: StatementBuilder, dialect: Dialect) -> TextualSelect:
+    """
+    Return the statement produced by `build_statement`, compiled for `dialect`.
+
+    The Snowflake dialect disables SQLAlchemy's compiled statement cache, so
+    each execution of an ORM query would otherwise compile it from scratch.
+    Statements are compiled here only once, and the resulting SQL is reused as
+    a textual statement. All values that vary between executions must be passed
+    as named `bindparam`s, so that no cache key needs to be derived from them.
+    """
+
+    key = (build_statement, type(dialect))
+    statement = _statements.get(key)
+
+    if statement is None:
+        log.debug("Compiling statement: %s", build_statement.__name__)
+        select_statement = build_statement()
+        compiled = select_statement.compile(dialect=type(dialect)(paramstyle="named"))
+        statement = (
+            text(compiled.string)
+            .bindparams(
+                *(
+                    bindparam(name, value=bind.value, type_=bind.type)
+                    for bind, name in compiled.bind_names.items()
+                )
+            )
+            .columns(*select_statement.selected_columns)
+        )
+        _statements[key] = statement
+
+    return statement
@@ -71,6 +71,38 @@ class InternalServerError(HTTPException):
         }
 
 
+class ServiceUnavailableError(HTTPException):
+    """
+    To be raised when a request requires a service that the server is not
+    configured to use.
+    """
+
+    MESSAGE = "Service unavailable"
+
+    def __init__(self, error: Exception) -> None:
+        log.error("%s: %s", self.MESSAGE, error)
+        super().__init__(status.HTTP_503_SERVICE_UNAVAILABLE, self.MESSAGE)
+
+    @classmethod
+    def doc(cls) -> Dict[str, Dict]:
+        """
+        Returns the documentation for a 503 Service Unavailable response,
+        in the OpenAPI spec format.
+        """
+
+        return {
+            "content": {
+                "application/json": {
+                    "example": {"detail": cls.MESSAGE},
+                    "schema": {
+                        "properties": {"detail": {"type": "string"}},
+                        "type": "object",
+                    },
+                }
+            }
+        }
+
+
 class TooManyRequestsError(HTTPException):
     """
     To be raised when a request exceeds the configured rate limit.
@@ -1,14 +1,86 @@
+import atexit
+import json
 import logging
+from copy import copy
+from logging.handlers import QueueHandler, QueueListener
 from os import path
+from queue import Full, Queue
 from sys import stdout
+from typing import Dict, Optional, Tuple
+
+from .metrics import LOG_RECORDS_DROPPED
 
 LOG_ENTRY_FORMAT = "%(asctime)s [%(levelname)s]: %(message)s"
 
+LogQueue = Queue[Optional[logging.LogRecord]]
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats each log record as a single line of compact JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, separators=(",", ":"))
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Adds log records to a bounded queue without blocking, discarding
+    them when the queue is full.
+    """
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            LOG_RECORDS_DROPPED.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merge the message's arguments into it, as they may change before the
+        record is handled. Unlike `QueueHandler`, the record is not formatted
+        here, and its exception is kept, so that the listener's formatter
+        can include the traceback.
+        """
+
+        record = copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class DrainingQueueListener(QueueListener):
+    """
+    Handles log records in a background thread. When stopped, waits for
+    space in the queue, so that every record already queued is handled.
+    """
+
+    def __init__(self, queue: LogQueue, handler: logging.Handler) -> None:
+        super().__init__(queue, handler, respect_handler_level=True)
+        self.log_queue = queue
+
+    def enqueue_sentinel(self) -> None:
+        self.log_queue.put(None)  # The sentinel that stops the listener thread
+
+
+# The queue handler added to each logger, and the listener handling its records
+background_handlers: Dict[str, Tuple[DroppingQueueHandler, DrainingQueueListener]] = {}
+
 
 def get_fideslog_logger(
     level: str,
     destination: str,
     destination_type: str,
+    log_format: str = "text",
+    queue_size: int = 10000,
 ) -> logging.Logger:
     """
     Configure and return the top-level fideslog logger. All loggers retrieved
@@ -23,6 +95,10 @@ def get_fideslog_logger(
     ```
     Here, `__name__` resolves to `fideslog.api.config`, and all configuration
     applied by this function will also apply to the returned logger.
+
+    Records are written to the `destination` by a background thread, so that
+    logging never blocks the event loop. Up to `queue_size` records may wait
+    to be written, after which further records are dropped and counted.
     """
 
     root_logger = logging.getLogger()
@@ -33,7 +109,9 @@ def get_fideslog_logger(
     logger.setLevel(logging.getLevelName(level))
     logger.propagate = False
 
-    formatter = logging.Formatter(LOG_ENTRY_FORMAT)
+    formatter = (
+        JSONFormatter() if log_format == "json" else logging.Formatter(LOG_ENTRY_FORMAT)
+    )
 
     handler: logging.Handler
     if destination_type == "file":
@@ -50,6 +128,49 @@ def get_fideslog_logger(
         handler = logging.StreamHandler(stdout)
 
     handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    handle_in_background(logger, handler, queue_size)
 
     return logger
+
+
+def handle_in_background(
+    logger: logging.Logger,
+    handler: logging.Handler,
+    queue_size: int,
+) -> None:
+    """
+    Send the records of `logger` through a queue of up to `queue_size` records
+    to `handler`, which handles them in a background thread.
+
+    Each logger has at most one such queue, so any previous queue is first
+    removed, as by `stop_handling_in_background`.
+    """
+
+    stop_handling_in_background(logger)
+
+    queue: LogQueue = Queue(queue_size)
+    listener = DrainingQueueListener(queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    queue_handler = DroppingQueueHandler(queue)
+    logger.addHandler(queue_handler)
+    background_handlers[logger.name] = (queue_handler, listener)
+
+
+def stop_handling_in_background(logger: logging.Logger) -> None:
+    """
+    Remove the queue added to `logger` by `handle_in_background`, if any, and
+    stop its thread once it has handled the records already queued.
+    """
+
+    previous = background_handlers.pop(logger.name, None)
+    if previous is None:
+        return
+
+    queue_handler, listener = previous
+    logger.removeHandler(queue_handler)
+    atexit.unregister(listener.stop)
+    listener.stop()
+    for listener_handler in listener.handlers:
+        listener_handler.close()
@@ -1,115 +1,148 @@
 import logging
-from datetime import datetime
-from hmac import compare_digest
-from http import HTTPStatus
-from typing import Callable
-
-from fastapi import FastAPI, Request, Response, status
-from fastapi.responses import JSONResponse
-from slowapi.errors import RateLimitExceeded
-from slowapi.extension import Limiter, _rate_limit_exceeded_handler
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.util import get_remote_address
+import os
+from asyncio import create_task
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from uvicorn import run
 
-from fideslog.api.config import ServerSettings, config
+from fideslog.api.config import METRICS_DIR_VAR, ServerSettings, config
+from fideslog.api.database import check_pool_liveness, dispose_engine, warm_up_pool
+from fideslog.api.metrics import share_periodically, write_snapshot
+from fideslog.api.middleware import RequestMiddleware
+from fideslog.api.rate_limit import limiter
 from fideslog.api.router import api_router
+from fideslog.api.serialization import response_class
+
+# The number of seconds between each worker process sharing its metrics
+METRICS_SHARE_INTERVAL = 1
 
 log = logging.getLogger("fideslog.api.main")
 
-app = FastAPI(title="fideslog")
-app.state.limiter = Limiter(
-    default_limits=[config.server.request_rate_limit],
-    headers_enabled=True,
-    key_func=get_remote_address,
-    retry_after="http-date",
-)
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
+app = FastAPI(title="fideslog", default_response_class=response_class)
+app.add_middleware(RequestMiddleware)
 app.include_router(api_router)
 
 
-# Defined before `log_request` and `require_version_header` to ensure that each are always executed.
-@app.middleware("http")
-async def require_access_token(request: Request, call_next: Callable) -> Response:
+@app.on_event("startup")
+async def start_database_pool() -> None:
     """
-    Require an `Authorization: Token {value}` header to serve a response.
+    Open the configured number of database connections before serving any
+    requests, and begin checking idle connections in the background if enabled.
     """
 
-    secured_endpoints = [
-        ("GET", "/registrations"),
-    ]
-    token = request.headers.get("Authorization", "").lstrip("Token ")
+    await run_in_threadpool(warm_up_pool, config.database.pool_warm_up)
+
+    if config.database.pool_ping_interval > 0:
+        app.state.pool_liveness_check = create_task(
+            check_pool_liveness(config.database.pool_ping_interval)
+        )
 
-    if (request.method, request.url.path) not in secured_endpoints or compare_digest(
-        token,
-        config.security.access_token,
-    ):
-        return await call_next(request)
 
-    return JSONResponse(
-        {"error": "Unauthorized"},
-        status.HTTP_401_UNAUTHORIZED,
-        {"WWW-Authenticate": "Token <value>"},
-    )
+@app.on_event("shutdown")
+async def stop_database_pool() -> None:
+    """
+    Stop checking idle database connections, and close all pooled connections.
+    """
 
+    liveness_check = getattr(app.state, "pool_liveness_check", None)
+    if liveness_check is not None:
+        liveness_check.cancel()
 
-# Defined before `log_request` to ensure that both are always executed.
-@app.middleware("http")
-async def require_version_header(request: Request, call_next: Callable) -> Response:
+    await run_in_threadpool(dispose_engine)
+
+
+@app.on_event("startup")
+async def start_rate_limit_sync() -> None:
+    """
+    Begin sharing rate limit counts with other API server instances,
+    if a shared store is configured.
     """
-    Enforce that the `X-Fideslog-Version` header was included on the request.
-    Does not apply to the `/docs`, `/health`, `/openapi.json`, and `/redoc`
-    endpoints, to ensure that they remain publicly available.
 
-    This header is intentionally undocumented, for mildly increased security.
+    if limiter.store is not None:
+        app.state.rate_limit_sync = create_task(
+            limiter.sync_periodically(config.server.rate_limit_sync_delay)
+        )
+
+
+@app.on_event("shutdown")
+async def stop_rate_limit_sync() -> None:
+    """
+    Stop sharing rate limit counts, after sharing those not yet synced.
     """
 
-    excluded_endpoints = ["/docs", "/health", "/openapi.json", "/redoc"]
-    version = request.headers.get("x-fideslog-version", None)
+    rate_limit_sync = getattr(app.state, "rate_limit_sync", None)
+    if rate_limit_sync is not None:
+        rate_limit_sync.cancel()
+        await limiter.sync()
 
-    if version is None and request.url.path not in excluded_endpoints:
-        return JSONResponse(
-            {"error": "Missing required header(s)"},
-            status.HTTP_400_BAD_REQUEST,
-        )
 
-    return await call_next(request)
+@app.on_event("startup")
+async def start_metrics_sharing() -> None:
+    """
+    Begin sharing this worker process's metrics with the other workers,
+    if the server is running more than one.
+    """
+
+    directory = os.getenv(METRICS_DIR_VAR)
+    if directory:
+        app.state.metrics_sharing = create_task(
+            share_periodically(directory, METRICS_SHARE_INTERVAL)
+        )
 
 
-@app.middleware("http")
-async def log_request(request: Request, call_next: Callable) -> Response:
+@app.on_event("shutdown")
+async def stop_metrics_sharing() -> None:
     """
-    Log basic information about every request handled by the server.
+    Stop sharing metrics, after sharing them a final time.
     """
 
-    start = datetime.now()
-    response = await call_next(request)
-    handler_time = round((datetime.now() - start).microseconds * 0.001, 3)
-    log.info(
-        'Request received (handled in %sms):\t"%s %s" %s',
-        handler_time,
-        request.method,
-        request.url.path,
-        f"{response.status_code} {HTTPStatus(response.status_code).phrase}",
-    )
-    return response
+    metrics_sharing = getattr(app.state, "metrics_sharing", None)
+    if metrics_sharing is not None:
+        metrics_sharing.cancel()
+        await run_in_threadpool(write_snapshot, os.environ[METRICS_DIR_VAR])
 
 
 def run_webserver(server_config: ServerSettings) -> None:
     """
     Manages the API server lifecycle.
+
+    When running more than one worker process, each worker shares its
+    metrics with the others through a temporary directory, so that any
+    of them can respond to `/metrics` with the metrics of all workers.
     """
 
     log.info("Starting the server...")
-    run(
-        "main:app",
-        host=server_config.host,
-        log_level=logging.WARNING,
-        log_config=None,
-        port=server_config.port,
-        reload=server_config.hot_reload,
-    )
+    if server_config.workers > 1:
+        os.environ[METRICS_DIR_VAR] = mkdtemp(prefix="fideslog-metrics-")
+        if not server_config.rate_limit_store_url:
+            log.warning(
+                "Rate limits are applied separately by each of the %s workers. "
+                "Set rate_limit_store_url to share them.",
+                server_config.workers,
+            )
+
+    try:
+        run(
+            "main:app",
+            backlog=server_config.backlog,
+            host=server_config.host,
+            http=server_config.http,
+            log_level=logging.WARNING,
+            log_config=None,
+            loop=server_config.loop,
+            port=server_config.port,
+            reload=server_config.hot_reload,
+            timeout_keep_alive=server_config.keep_alive_timeout,
+            workers=server_config.workers,
+        )
+    finally:
+        directory = os.environ.pop(METRICS_DIR_VAR, None)
+        if directory:
+            rmtree(directory, ignore_errors=True)
+
     log.info("Server stopped. Goodbye!")
 
 
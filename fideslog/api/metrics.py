@@ -0,0 +1,337 @@
+import os
+from asyncio import sleep
+from bisect import bisect_left
+from glob import glob
+from json import dump, load
+from threading import Lock
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[LabelValues, List[float]]
+Snapshot = Dict[str, List[Sample]]
+
+# Suitable for request latencies, in seconds
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """
+    Render label names and values in the Prometheus text exposition format.
+    """
+
+    if not names:
+        return ""
+
+    escaped = (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in values
+    )
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+def format_value(value: float) -> str:
+    """
+    Render a sample value without losing precision, omitting
+    the fractional part of whole numbers.
+    """
+
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Metric:
+    """
+    The base class for metrics, which are identified by a name and
+    a set of label values.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, description: str, labels: LabelValues = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.lock = Lock()
+
+    def render(self) -> Iterator[str]:
+        """Yield each line of this metric, in the Prometheus text exposition format."""
+
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self.render_samples()
+
+    def render_samples(self) -> Iterator[str]:
+        """Yield a line per sample of this metric."""
+
+        raise NotImplementedError
+
+    def empty(self) -> "Metric":
+        """Return a new metric with the same definition, and no samples."""
+
+        return type(self)(self.name, self.description, self.labels)
+
+    def snapshot(self) -> List[Sample]:
+        """Return the label values and numeric values of each sample."""
+
+        raise NotImplementedError
+
+    def merge(self, samples: List[Sample]) -> None:
+        """Add the values of `samples`, as returned by `snapshot`, to this metric."""
+
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A value that only ever increases."""
+
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labels: LabelValues = ()) -> None:
+        super().__init__(name, description, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Increase the value for `label_values` by `amount`."""
+
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render_samples(self) -> Iterator[str]:
+        with self.lock:
+            values = list(self.values.items())
+
+        for label_values, value in values:
+            labels = format_labels(self.labels, label_values)
+            yield f"{self.name}{labels} {format_value(value)}"
+
+    def snapshot(self) -> List[Sample]:
+        with self.lock:
+            return [(labels, [value]) for labels, value in self.values.items()]
+
+    def merge(self, samples: List[Sample]) -> None:
+        for label_values, (value,) in samples:
+            self.inc(*label_values, amount=value)
+
+
+class Histogram(Metric):
+    """Counts observed values in configurable buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: LabelValues = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+        # Per label values: the count in each bucket (the last being +Inf), and the sum
+        self.values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Record an observation of `value` for `label_values`."""
+
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.setdefault(
+                label_values,
+                ([0] * (len(self.buckets) + 1), [0.0]),
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def render_samples(self) -> Iterator[str]:
+        with self.lock:
+            values = [
+                (label_values, list(counts), total[0])
+                for label_values, (counts, total) in self.values.items()
+            ]
+
+        bucket_labels = self.labels + ("le",)
+        for label_values, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = format_labels(bucket_labels, label_values + (le,))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+
+            labels = format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+    def empty(self) -> "Histogram":
+        return Histogram(self.name, self.description, self.labels, self.buckets)
+
+    def snapshot(self) -> List[Sample]:
+        with self.lock:
+            return [
+                (labels, [*counts, total[0]])
+                for labels, (counts, total) in self.values.items()
+            ]
+
+    def merge(self, samples: List[Sample]) -> None:
+        with self.lock:
+            for label_values, values in samples:
+                counts, total = self.values.setdefault(
+                    tuple(label_values),
+                    ([0] * (len(self.buckets) + 1), [0.0]),
+                )
+                for index, count in enumerate(values[:-1]):
+                    counts[index] += int(count)
+
+                total[0] += values[-1]
+
+
+class Registry:
+    """A collection of metrics, to be exposed together."""
+
+    def __init__(self) -> None:
+        self.metrics: List[Metric] = []
+
+    def counter(self, name: str, description: str, labels: LabelValues = ()) -> Counter:
+        """Create and register a new `Counter`."""
+
+        counter = Counter(name, description, labels)
+        self.metrics.append(counter)
+        return counter
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labels: LabelValues = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create and register a new `Histogram`."""
+
+        histogram = Histogram(name, description, labels, buckets)
+        self.metrics.append(histogram)
+        return histogram
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+
+        return "\n".join(line for m in self.metrics for line in m.render()) + "\n"
+
+    def snapshot(self) -> Snapshot:
+        """Return the samples of all metrics, by metric name."""
+
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def render_shared(self, directory: str) -> str:
+        """
+        Render the combined metrics of this process and all other processes
+        sharing snapshots in `directory`.
+        """
+
+        combined = Registry()
+        combined.metrics = [metric.empty() for metric in self.metrics]
+
+        snapshots = [self.snapshot()]
+        for path in glob(os.path.join(directory, "*.json")):
+            if path != get_snapshot_path(directory):
+                with open(path, encoding="utf-8") as file:
+                    snapshots.append(load(file))
+
+        for snapshot in snapshots:
+            for metric in combined.metrics:
+                metric.merge(snapshot.get(metric.name, []))
+
+        return combined.render()
+
+
+def get_snapshot_path(directory: str) -> str:
+    """Return the path of the current process's snapshot in `directory`."""
+
+    return os.path.join(directory, f"{os.getpid()}.json")
+
+
+def write_snapshot(directory: str) -> None:
+    """
+    Share the metrics of the current process with others rendering
+    metrics from `directory`.
+    """
+
+    path = get_snapshot_path(directory)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        dump(registry.snapshot(), file)
+
+    # Replace the previous snapshot atomically, so that it is never read partially written
+    os.replace(f"{path}.tmp", path)
+
+
+async def share_periodically(directory: str, interval: float) -> None:
+    """Write a snapshot of this process's metrics every `interval` seconds."""
+
+    while True:
+        await sleep(interval)
+        await run_in_threadpool(write_snapshot, directory)
+
+
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "fideslog_requests_total",
+    "The number of requests handled.",
+    ("method", "route", "status"),
+)
+REQUEST_DURATION = registry.histogram(
+    "fideslog_request_duration_seconds",
+    "The time taken to handle each request.",
+    ("method", "route"),
+)
+REQUEST_SIZE = registry.counter(
+    "fideslog_request_size_bytes_total",
+    "The number of request body bytes received.",
+    ("method", "route"),
+)
+RESPONSE_SIZE = registry.counter(
+    "fideslog_response_size_bytes_total",
+    "The number of response body bytes sent.",
+    ("method", "route"),
+)
+STAGE_DURATION = registry.histogram(
+    "fideslog_stage_duration_seconds",
+    "The time taken by each stage of handling a request.",
+    ("stage",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025) + DEFAULT_BUCKETS,
+)
+EVENT_SIZE = registry.histogram(
+    "fideslog_event_size_bytes",
+    "The size of each encoded analytics event written to storage.",
+    buckets=(128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+STORAGE_ERRORS = registry.counter(
+    "fideslog_storage_errors_total",
+    "The number of failed requests to the storage service.",
+    ("code",),
+)
+LOG_RECORDS_DROPPED = registry.counter(
+    "fideslog_log_records_dropped_total",
+    "The number of log records discarded because the logging queue was full.",
+)
+VALIDATION_CACHE = registry.counter(
+    "fideslog_validation_cache_total",
+    "The number of validations answered from (hit) or added to (miss) a cache.",
+    ("cache", "result"),
+)
@@ -0,0 +1,245 @@
+from collections import OrderedDict
+from hmac import compare_digest
+from http import HTTPStatus
+from logging import getLogger
+from random import random
+from time import perf_counter_ns
+from typing import List, Optional, Tuple
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import config
+from .metrics import REQUEST_DURATION, REQUEST_SIZE, REQUESTS, RESPONSE_SIZE
+from .rate_limit import RateLimitResult, limiter
+
+# Endpoints that require an `Authorization: Token {value}` header
+SECURED_ENDPOINTS: List[Tuple[str, str]] = [
+    ("GET", "/registrations"),
+    ("GET", "/registrations/export"),
+]
+
+# Endpoints that remain publicly available without the `X-Fideslog-Version` header
+VERSION_EXCLUDED_ENDPOINTS = [
+    "/docs",
+    "/health",
+    "/metrics",
+    "/openapi.json",
+    "/redoc",
+]
+
+# The route label recorded for requests that match no route
+UNMATCHED_ROUTE = "<unmatched>"
+
+# The number of requested paths for which to remember the matching route
+ROUTE_PATHS_MAX_ENTRIES = 1024
+
+log = getLogger(__name__)
+
+
+class RequestMiddleware:
+    """
+    Enforces the required request headers and rate limits, and logs basic
+    information about every request handled by the server.
+
+    Implemented as a single ASGI middleware, rather than a stack of
+    `@app.middleware("http")` functions, to avoid wrapping each request and
+    response in an additional task and stream per check.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter_ns()
+        method = scope["method"]
+        route = get_route_path(scope)
+        rate_limit: Optional[RateLimitResult] = None
+        request_size = 0
+        response_size = 0
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def receive_and_record_size() -> Message:
+            nonlocal request_size
+            message = await receive()
+            request_size += len(message.get("body", b""))
+            return message
+
+        async def send_and_record_status(message: Message) -> None:
+            nonlocal response_size, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if rate_limit is not None:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        *rate_limit.headers(),
+                    ]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+
+            await send(message)
+
+        try:
+            rejection = self.check_headers(scope)
+            if rejection is None and route != UNMATCHED_ROUTE:
+                rate_limit = limiter.hit_client(
+                    get_client_address(scope),
+                    get_client_id(scope),
+                    method,
+                    route,
+                )
+                if rate_limit is not None and not rate_limit.allowed:
+                    rejection = rate_limit.response()
+
+            if rejection is None:
+                await self.app(scope, receive_and_record_size, send_and_record_status)
+            else:
+                await rejection(scope, receive_and_record_size, send_and_record_status)
+        finally:
+            elapsed = perf_counter_ns() - start
+
+            REQUEST_DURATION.observe(elapsed / 1e9, method, route)
+            REQUEST_SIZE.inc(method, route, amount=request_size)
+            RESPONSE_SIZE.inc(method, route, amount=response_size)
+            REQUESTS.inc(method, route, str(status_code))
+
+            if should_log_request(status_code):
+                log.info(
+                    'Request received (handled in %sms):\t"%s %s" %s',
+                    round(elapsed / 1e6, 3),
+                    method,
+                    scope["path"],
+                    f"{status_code} {HTTPStatus(status_code).phrase}",
+                )
+
+    @staticmethod
+    def check_headers(scope: Scope) -> Optional[JSONResponse]:
+        """
+        Return an error response if the request is missing a required header.
+
+        The `X-Fideslog-Version` header is required on all requests except to
+        the `VERSION_EXCLUDED_ENDPOINTS`. It is intentionally undocumented, for
+        mildly increased security. An `Authorization: Token {value}` header is
+        required on requests to the `SECURED_ENDPOINTS`.
+        """
+
+        headers = Headers(scope=scope)
+        path = scope["path"]
+
+        if (
+            headers.get("x-fideslog-version", None) is None
+            and path not in VERSION_EXCLUDED_ENDPOINTS
+        ):
+            return JSONResponse(
+                {"error": "Missing required header(s)"},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        if (scope["method"], path) in SECURED_ENDPOINTS and not compare_digest(
+            headers.get("Authorization", "").lstrip("Token "),
+            config.security.access_token,
+        ):
+            return JSONResponse(
+                {"error": "Unauthorized"},
+                status.HTTP_401_UNAUTHORIZED,
+                {"WWW-Authenticate": "Token <value>"},
+            )
+
+        return None
+
+
+def get_client_address(scope: Scope) -> str:
+    """Return the IP address from which the request was sent."""
+
+    client = scope.get("client")
+    return client[0] if client else "127.0.0.1"
+
+
+def get_client_id(scope: Scope) -> Optional[str]:
+    """
+    Return the ID of the SDK client that sent the request, if rate
+    limits are configured to be applied per client.
+    """
+
+    if config.server.rate_limit_key != "client_id":
+        return None
+
+    return Headers(scope=scope).get("x-fideslog-client-id")
+
+
+def should_log_request(status_code: int) -> bool:
+    """
+    Return whether to log a request, sampling successful requests at the
+    configured `request_sample_rate`. Failed requests are always logged.
+    """
+
+    return (
+        status_code >= status.HTTP_400_BAD_REQUEST
+        or random() < config.logging.request_sample_rate
+    )
+
+
+class RoutePaths:
+    """
+    Remembers the path template of the route matching each of the `max_entries`
+    most recently requested paths, or `UNMATCHED_ROUTE` if none matched, so that
+    each request does not try every route's pattern in turn. All are forgotten
+    if the application's routes change.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.paths: "OrderedDict[str, str]" = OrderedDict()
+        self.routes_key: Optional[Tuple[int, int]] = None
+
+    def get(self, scope: Scope) -> str:
+        """Return the path template of the route matching the request."""
+
+        routes: List[BaseRoute] = getattr(scope.get("app"), "routes", [])
+        routes_key = (id(routes), len(routes))
+        if routes_key != self.routes_key:
+            self.paths.clear()
+            self.routes_key = routes_key
+
+        path = scope["path"]
+        route_path = self.paths.get(path)
+        if route_path is not None:
+            self.paths.move_to_end(path)
+            return route_path
+
+        route_path = match_route_path(routes, path)
+        self.paths[path] = route_path
+        if len(self.paths) > self.max_entries:
+            self.paths.popitem(last=False)
+
+        return route_path
+
+
+def match_route_path(routes: List[BaseRoute], path: str) -> str:
+    """Return the path template of the first of `routes` matching `path`."""
+
+    for route in routes:
+        path_regex = getattr(route, "path_regex", None)
+        if path_regex is not None and path_regex.match(path):
+            return getattr(route, "path")
+
+    return UNMATCHED_ROUTE
+
+
+route_paths = RoutePaths(ROUTE_PATHS_MAX_ENTRIES)
+
+
+def get_route_path(scope: Scope) -> str:
+    """
+    Return the path template of the route matching the request, such as
+    `/registrations/{client_id}`, to keep the number of metric labels bounded.
+    """
+
+    return route_paths.get(scope)
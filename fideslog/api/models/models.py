@@ -1,10 +1,10 @@
-from typing import Dict
+from typing import Dict, Optional, Type
 
 from sqlalchemy import Boolean, Column, DateTime, Integer, Sequence, String
+from sqlalchemy.engine import Dialect
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql import expression
-from sqlalchemy_utils import StringEncryptedType
-from sqlalchemy_utils.types.encrypted.encrypted_type import AesGcmEngine
+from sqlalchemy.types import TypeDecorator
 
 from ..config import config
 from ..database import Base
@@ -23,6 +23,60 @@ def sf_utcnow(_: Column, __: str, ___: Dict) -> str:
     return "sysdate()"
 
 
+@compiles(UtcNow, "sqlite")
+def sqlite_utcnow(*_: object, **__: object) -> str:
+    """Allows the tables to be created in SQLite, for local development"""
+    return "CURRENT_TIMESTAMP"
+
+
+class EncryptedString(TypeDecorator):  # pylint: disable=too-many-ancestors
+    """
+    A string encrypted with AES-GCM by `sqlalchemy_utils`. Importing
+    `sqlalchemy_utils` is slow, so it is deferred until a value is first
+    encrypted or decrypted.
+    """
+
+    impl = String
+    cache_ok = True
+
+    def __init__(self, key: str) -> None:
+        super().__init__()
+        self.key = key
+        self.encrypted_type: Optional[TypeDecorator] = None
+
+    def get_encrypted_type(self) -> TypeDecorator:
+        """Return the `sqlalchemy_utils` type that does the encryption."""
+
+        if self.encrypted_type is None:
+            # pylint: disable=import-outside-toplevel
+            from sqlalchemy_utils import StringEncryptedType
+            from sqlalchemy_utils.types.encrypted.encrypted_type import AesGcmEngine
+
+            self.encrypted_type = StringEncryptedType(String, self.key, AesGcmEngine)
+
+        return self.encrypted_type
+
+    def process_bind_param(
+        self, value: Optional[str], dialect: Dialect
+    ) -> Optional[str]:
+        return self.get_encrypted_type().process_bind_param(value, dialect)
+
+    def process_result_value(
+        self, value: Optional[str], dialect: Dialect
+    ) -> Optional[str]:
+        return self.get_encrypted_type().process_result_value(value, dialect)
+
+    def process_literal_param(
+        self, value: Optional[str], dialect: Dialect
+    ) -> Optional[str]:
+        # Values rendered inline are encrypted just as bound values are
+        return self.get_encrypted_type().process_bind_param(value, dialect)
+
+    @property
+    def python_type(self) -> Type[str]:
+        return str
+
+
 class AnalyticsEvent(Base):
     """
     The persisted details about an analytics event.
@@ -67,10 +121,11 @@ class Registration(Base):
     client_id = Column("CLIENT_ID", String, default=None, nullable=True)
     email = Column(
         "EMAIL",
-        StringEncryptedType(String, config.database.encryption_key, AesGcmEngine),
+        EncryptedString(config.database.encryption_key),
         default=None,
         nullable=True,
     )
+    email_index = Column("EMAIL_INDEX", String, default=None, nullable=True)
     organization = Column("ORGANIZATION", String, default=None, nullable=True)
     created_at = Column("CREATED_AT", DateTime(timezone=True), server_default=UtcNow())
     updated_at = Column("UPDATED_AT", DateTime(timezone=True), server_default=UtcNow())
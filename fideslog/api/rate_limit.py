@@ -0,0 +1,384 @@
+# pylint: disable=import-outside-toplevel
+
+import re
+from asyncio import sleep
+from collections import OrderedDict
+from email.utils import formatdate
+from functools import lru_cache
+from logging import getLogger
+from math import ceil
+from threading import Lock
+from time import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from .config import ServerSettings, config
+
+ALL_ROUTES = "*"
+EXEMPT = "exempt"
+MAX_CLIENT_ID_LENGTH = 128
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+RATE_LIMIT_PATTERN = re.compile(
+    r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$",
+    re.IGNORECASE,
+)
+
+# Routes that are never rate limited, unless configured otherwise
+DEFAULT_ROUTE_RATE_LIMITS = {"/health": EXEMPT, "/metrics": EXEMPT}
+
+Headers = List[Tuple[bytes, bytes]]
+Increment = Tuple[str, int, int]  # The shared key, amount, and seconds until it expires
+WindowKey = Tuple[str, str, str]
+
+log = getLogger(__name__)
+
+
+class RateLimit(NamedTuple):
+    """An amount of requests allowed per period of time."""
+
+    amount: int
+    multiples: int
+    unit: str
+
+    @property
+    def period(self) -> int:
+        """The length of the period, in seconds."""
+
+        return self.multiples * PERIODS[self.unit]
+
+    def __str__(self) -> str:
+        return f"{self.amount} per {self.multiples} {self.unit}"
+
+
+def parse_rate_limit(value: str) -> Optional[RateLimit]:
+    """
+    Parse a rate limit such as `100/minute`, `100 per minute`, or
+    `1000/5 minutes`. Returns `None` for the value `exempt`.
+    """
+
+    if value.strip().lower() == EXEMPT:
+        return None
+
+    match = RATE_LIMIT_PATTERN.match(value)
+    if match is None:
+        raise ValueError(f"Invalid rate limit: {value}")
+
+    amount, multiples, unit = match.groups()
+    if int(amount) < 1 or int(multiples or 1) < 1:
+        raise ValueError(f"Rate limits must allow at least 1 request: {value}")
+
+    return RateLimit(int(amount), int(multiples or 1), unit.lower())
+
+
+class RateLimitResult(NamedTuple):
+    """The outcome of counting a request against a rate limit."""
+
+    allowed: bool
+    limit: RateLimit
+    remaining: int
+    reset: int  # The UNIX timestamp at which the key may next make a request
+
+    def headers(self) -> Headers:
+        """The rate limit headers to include on the response."""
+
+        return [
+            (b"x-ratelimit-limit", str(self.limit.amount).encode()),
+            (b"x-ratelimit-remaining", str(self.remaining).encode()),
+            (b"x-ratelimit-reset", str(self.reset).encode()),
+            (b"retry-after", format_http_date(self.reset)),
+        ]
+
+    def response(self) -> JSONResponse:
+        """
+        The response to a request that exceeded the rate limit, to which
+        the rate limit `headers` must be added.
+        """
+
+        return JSONResponse(
+            {"error": f"Rate limit exceeded: {self.limit}"},
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+
+
+@lru_cache(maxsize=256)
+def format_http_date(timestamp: int) -> bytes:
+    """
+    Format a UNIX timestamp as an HTTP date. Most requests share the
+    same few reset times, so the formatted values are cached.
+    """
+
+    return formatdate(timestamp).encode()
+
+
+class RateLimitStore:
+    """
+    The storage with which `RateLimiter`s share their counts. Subclasses
+    must implement `increment`.
+    """
+
+    def increment(self, increments: List[Increment]) -> List[int]:
+        """
+        Increase each key by its amount, returning the new total of each.
+        Keys are removed once they expire.
+        """
+
+        raise NotImplementedError
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    Shares counts between `RateLimiter`s in the current process, as a stand-in
+    for a shared server in tests. Keys do not expire.
+    """
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, int] = {}
+        self.lock = Lock()
+
+    def increment(self, increments: List[Increment]) -> List[int]:
+        with self.lock:
+            for key, amount, _ in increments:
+                self.totals[key] = self.totals.get(key, 0) + amount
+
+            return [self.totals[key] for key, _, _ in increments]
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Shares counts between API server instances in a Redis server,
+    or any server compatible with the Redis protocol.
+    """
+
+    def __init__(self, url: str, prefix: str = "fideslog:rate_limit:") -> None:
+        from redis import Redis
+
+        self.client = Redis.from_url(url, socket_timeout=1)
+        self.prefix = prefix
+
+    def increment(self, increments: List[Increment]) -> List[int]:
+        pipeline = self.client.pipeline(transaction=False)
+        for key, amount, ttl in increments:
+            pipeline.incrby(self.prefix + key, amount)
+            pipeline.expire(self.prefix + key, ttl)
+
+        return pipeline.execute()[::2]
+
+
+class RateLimiter:
+    """
+    Counts requests per key and route using a sliding window, which weights
+    the count from the previous period by how much of it overlaps the
+    trailing period. Only the counts of the `max_keys` most recently seen
+    keys are retained.
+
+    With a `store`, counts are shared between API server instances. Requests
+    are checked against local counts, which `sync` updates with the totals of
+    all instances in a single batch. So limits are only enforced approximately,
+    but no request waits on the store.
+    """
+
+    def __init__(
+        self,
+        default_limit: str,
+        route_limits: Dict[str, str],
+        max_keys: int,
+        store: Optional[RateLimitStore] = None,
+        clock: Callable[[], float] = time,
+    ) -> None:
+        self.default_limit = parse_rate_limit(default_limit)
+        self.route_limits = {
+            route: parse_rate_limit(limit)
+            for route, limit in {**DEFAULT_ROUTE_RATE_LIMITS, **route_limits}.items()
+        }
+        self.max_keys = max_keys
+        self.store = store
+        self.clock = clock
+
+        # Per key: the current window number, its count, the previous window's
+        # count, and the number of requests in the current window not yet synced
+        self.windows: "OrderedDict[WindowKey, List[float]]" = OrderedDict()
+        self.unsynced: Set[WindowKey] = set()
+
+    def get_limit(self, route: str) -> Optional[RateLimit]:
+        """Return the limit that applies to `route`, or `None` if it is exempt."""
+
+        return self.route_limits.get(route, self.default_limit)
+
+    def hit(self, key: str, method: str, route: str) -> Optional[RateLimitResult]:
+        """
+        Count a request from `key` to `route` if it is within the route's rate
+        limit. Returns `None` if the route is exempt.
+        """
+
+        limit = self.get_limit(route)
+        if limit is None:
+            return None
+
+        now = self.clock()
+        window_key = (key, method, route)
+        counts = self.get_counts(window_key, int(now // limit.period))
+
+        window_start = counts[0] * limit.period
+        weight = 1 - (now - window_start) / limit.period
+        used = counts[2] * weight + counts[1]
+
+        if used + 1 > limit.amount:
+            retry_at = get_retry_time(limit, window_start, counts[1], counts[2])
+            return RateLimitResult(False, limit, 0, ceil(retry_at))
+
+        counts[1] += 1
+        if self.store is not None:
+            counts[3] += 1
+            self.unsynced.add(window_key)
+
+        remaining = int(limit.amount - used - 1)
+        return RateLimitResult(True, limit, remaining, int(window_start) + limit.period)
+
+    def hit_client(
+        self,
+        address: str,
+        client_id: Optional[str],
+        method: str,
+        route: str,
+    ) -> Optional[RateLimitResult]:
+        """
+        Count a request from `client_id` to `route`, if it is within the
+        route's rate limit. Without a `client_id`, requests are counted per
+        IP `address` instead.
+
+        Many clients may share an IP address, so with a `client_id` the requests
+        from each `address` are also counted across all routes, against the
+        limit for `ALL_ROUTES`. This prevents a single IP address from avoiding
+        rate limits by sending many different client IDs.
+        """
+
+        if not client_id or len(client_id) > MAX_CLIENT_ID_LENGTH:
+            return self.hit(address, method, route)
+
+        if self.get_limit(route) is None:
+            return None
+
+        address_result = self.hit(address, ALL_ROUTES, ALL_ROUTES)
+        if address_result is not None and not address_result.allowed:
+            return address_result
+
+        return self.hit(f"client_id:{client_id}", method, route)
+
+    def get_counts(self, window_key: WindowKey, window: int) -> List[float]:
+        """
+        Return the counts for `window_key`, moving them to `window` if it has
+        begun since they were last updated.
+        """
+
+        counts = self.windows.get(window_key)
+        if counts is None:
+            counts = self.windows[window_key] = [window, 0, 0, 0]
+            if len(self.windows) > self.max_keys:
+                self.windows.popitem(last=False)
+
+            return counts
+
+        self.windows.move_to_end(window_key)
+        if counts[0] != window:
+            counts[2] = counts[1] if counts[0] == window - 1 else 0
+            counts[0], counts[1], counts[3] = window, 0, 0
+
+        return counts
+
+    async def sync(self) -> None:
+        """
+        Add the requests counted since the last sync to the shared counts, and
+        replace the local counts with the shared totals.
+        """
+
+        if self.store is None or not self.unsynced:
+            return
+
+        batch = self.collect_unsynced()
+        increments = [increment for _, _, increment in batch]
+        totals: List[Optional[int]]
+        try:
+            totals = list(await run_in_threadpool(self.store.increment, increments))
+        except Exception as err:  # pylint: disable=broad-except
+            log.warning("Failed to sync rate limit counts: %s", err)
+            totals = [None] * len(batch)
+
+        for (window_key, window, (_, amount, _)), total in zip(batch, totals):
+            counts = self.windows.get(window_key)
+            if counts is None or counts[0] != window:
+                continue
+
+            if total is None:
+                counts[3] += amount  # Retry with the next sync
+                self.unsynced.add(window_key)
+            else:
+                counts[1] = total + counts[3]
+
+    def collect_unsynced(self) -> List[Tuple[WindowKey, int, Increment]]:
+        """
+        Return the requests counted since the last sync per key and window, as
+        increments to the shared counts, and reset the local unsynced counts.
+        """
+
+        batch = []
+        for window_key in self.unsynced:
+            counts = self.windows.get(window_key)
+            limit = self.get_limit(window_key[2])
+            if counts is None or limit is None or not counts[3]:
+                continue
+
+            window = int(counts[0])
+            shared_key = ":".join((*window_key, str(window)))
+            batch.append(
+                (window_key, window, (shared_key, int(counts[3]), limit.period * 2))
+            )
+            counts[3] = 0
+
+        self.unsynced.clear()
+        return batch
+
+    async def sync_periodically(self, interval: float) -> None:
+        """Sync with the shared store every `interval` seconds."""
+
+        while True:
+            await sleep(interval)
+            await self.sync()
+
+
+def get_retry_time(
+    limit: RateLimit,
+    window_start: float,
+    current: float,
+    previous: float,
+) -> float:
+    """
+    Return the time at which the weighted count of the previous and current
+    windows will next allow a request, given no further requests are counted.
+    """
+
+    allowed = limit.amount - 1
+    if current <= allowed and previous > 0:
+        return window_start + (1 - (allowed - current) / previous) * limit.period
+
+    # The previous window's count alone must decay enough in the next window
+    return window_start + (2 - allowed / current) * limit.period
+
+
+def get_rate_limit_store(settings: ServerSettings) -> Optional[RateLimitStore]:
+    """Return the shared store, if one is configured."""
+
+    if settings.rate_limit_store_url:
+        return RedisRateLimitStore(settings.rate_limit_store_url)
+
+    return None
+
+
+limiter = RateLimiter(
+    config.server.request_rate_limit,
+    {ALL_ROUTES: config.server.ip_rate_limit, **config.server.route_rate_limits},
+    config.server.rate_limit_max_keys,
+    get_rate_limit_store(config.server),
+)
@@ -1,14 +1,16 @@
 from logging import getLogger
+from typing import Union
 
 from boto3 import Session
 from botocore.exceptions import ClientError
-from fastapi import APIRouter, Depends, Request, status
+from fastapi import APIRouter, Depends, Request, Response, status
 
 from ..config import config
 from ..database import get_storage
 from ..database.events import create
 from ..errors import InternalServerError, TooManyRequestsError
 from ..schemas.analytics_event import AnalyticsEvent
+from ..tracing import span
 
 LOG_BUCKET = config.storage.bucket_name
 
@@ -21,6 +23,9 @@ event_router = APIRouter(tags=["Events"], prefix="/events")
     response_description="The created event",
     response_model=AnalyticsEvent,
     responses={
+        status.HTTP_202_ACCEPTED: {
+            "description": "The event was stored, and `events.response_mode` is `accepted`",
+        },
         status.HTTP_429_TOO_MANY_REQUESTS: TooManyRequestsError.doc(),
         status.HTTP_500_INTERNAL_SERVER_ERROR: InternalServerError.doc(),
     },
@@ -30,9 +35,12 @@ async def add_event(
     _: Request,
     event: AnalyticsEvent,
     session: Session = Depends(get_storage),
-) -> AnalyticsEvent:
+) -> Union[AnalyticsEvent, Response]:
     """
     Create a new analytics event.
+
+    Clients do not use the created event, so it can be omitted from the
+    response, which then skips its validation and serialization.
     """
     config_dict = (
         {
@@ -43,12 +51,20 @@ async def add_event(
         if config.storage.region_name
         else {}
     )
+    if config.storage.endpoint_url:
+        config_dict["endpoint_url"] = config.storage.endpoint_url
+
+    with span("add_event"):
+        with span("client"):
+            client = session.client("s3", **config_dict)  # type: ignore
+
+        try:
+            create(client=client, bucket=LOG_BUCKET, event=event)
+            client.close()
+        except ClientError as err:
+            raise InternalServerError(err) from err
 
-    client = session.client("s3", **config_dict)  # type: ignore
-    try:
-        create(client=client, bucket=LOG_BUCKET, event=event)
-        client.close()
-    except ClientError as err:
-        raise InternalServerError(err) from err
+    if config.events.response_mode == "accepted":
+        return Response(status_code=status.HTTP_202_ACCEPTED)
 
     return event
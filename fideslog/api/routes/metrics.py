@@ -0,0 +1,31 @@
+import os
+
+from fastapi import APIRouter, Request, status
+from fastapi.responses import PlainTextResponse
+
+from ..config import METRICS_DIR_VAR
+from ..errors import TooManyRequestsError
+from ..metrics import registry
+
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+@metrics_router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    responses={
+        status.HTTP_429_TOO_MANY_REQUESTS: TooManyRequestsError.doc(),
+    },
+    status_code=status.HTTP_200_OK,
+)
+def metrics(_: Request) -> PlainTextResponse:
+    """
+    Expose the server metrics, in the Prometheus text exposition format.
+    Includes the metrics of all worker processes.
+    """
+
+    directory = os.getenv(METRICS_DIR_VAR)
+    return PlainTextResponse(
+        registry.render_shared(directory) if directory else registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
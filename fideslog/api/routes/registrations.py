@@ -1,18 +1,42 @@
+from datetime import datetime
+from enum import Enum
+from json import dumps
 from logging import getLogger
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
 
-from fastapi import APIRouter, Depends, Request, Response, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from fastapi_pagination import Params
-from fastapi_pagination.bases import AbstractPage
+from pydantic import EmailStr
 from sqlalchemy.exc import DBAPIError, NoResultFound
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.exc import UnmappedInstanceError
+from starlette.concurrency import run_in_threadpool
 
+from ..cache import registration_cache
 from ..database import get_db
-from ..database.registrations import create, delete, get, update
-from ..errors import InternalServerError, NotFoundError, TooManyRequestsError
+from ..database.csv_writer import stream_csv_rows
+from ..database.registrations import (
+    EXPORT_BATCH_SIZE,
+    create,
+    delete,
+    email_blind_index,
+    export,
+    get,
+    update,
+)
+from ..errors import (
+    InternalServerError,
+    NotFoundError,
+    ServiceUnavailableError,
+    TooManyRequestsError,
+)
 from ..models.models import Registration as RegistrationORM
 from ..schemas.registration import Registration
+from ..serialization import encode
+
+EXPORT_FIELDS = list(Registration.__fields__)
 
 log = getLogger(__name__)
 registration_router = APIRouter(tags=["Registrations"], prefix="/registrations")
@@ -23,26 +47,153 @@ registration_router = APIRouter(tags=["Registrations"], prefix="/registrations")
     response_description="A list of registrations",
     response_model=List[Registration],
     responses={
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The registrations are unchanged since the request's `If-None-Match` entity tag was issued",
+        },
         status.HTTP_429_TOO_MANY_REQUESTS: TooManyRequestsError.doc(),
         status.HTTP_500_INTERNAL_SERVER_ERROR: InternalServerError.doc(),
+        status.HTTP_503_SERVICE_UNAVAILABLE: ServiceUnavailableError.doc(),
     },
     status_code=status.HTTP_200_OK,
 )
 async def list_registrations(
-    _: Request,
+    request: Request,
+    email: Optional[EmailStr] = None,
     params: Params = Depends(),
     database: Session = Depends(get_db),
-) -> AbstractPage[RegistrationORM]:
+) -> Response:
+    """
+    List existing registrations. If `email` is provided, only registrations
+    for that email address are included.
+
+    Responses are cached, and include an `ETag` header. Requests that include
+    that value in an `If-None-Match` header receive an empty `304` response
+    if the registrations have not changed.
+    """
+
+    async def load_registrations() -> bytes:
+        registrations = await run_in_threadpool(get, database, params, email)
+        return serialize_registrations(registrations.items)  # type: ignore[attr-defined]
+
+    email_index = email_blind_index(email) if email else ""
+    try:
+        cached = await registration_cache.get_or_load(
+            f"registrations:{params.page}:{params.size}:{email_index}",
+            load_registrations,
+        )
+    except DBAPIError as err:
+        raise InternalServerError(err) from err
+
+    headers = {"ETag": cached.etag}
+    if cached.etag in get_request_etags(request):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(cached.body, headers=headers, media_type="application/json")
+
+
+def get_request_etags(request: Request) -> List[str]:
+    """
+    Return the entity tags included in a request's `If-None-Match` header.
+    """
+
+    return [
+        etag.strip().removeprefix("W/")
+        for etag in request.headers.get("if-none-match", "").split(",")
+    ]
+
+
+def serialize_registrations(registrations: Sequence[RegistrationORM]) -> bytes:
+    """
+    Render registrations as the JSON body of a response.
+    """
+
+    return encode(
+        jsonable_encoder([Registration.from_orm(record) for record in registrations])
+    )
+
+
+class ExportFormat(str, Enum):
+    """The available formats in which to export registrations."""
+
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+@registration_router.get(
+    "/export",
+    response_class=StreamingResponse,
+    response_description="All registrations, as CSV or newline-delimited JSON",
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS: TooManyRequestsError.doc(),
+        status.HTTP_500_INTERNAL_SERVER_ERROR: InternalServerError.doc(),
+        status.HTTP_503_SERVICE_UNAVAILABLE: ServiceUnavailableError.doc(),
+    },
+    status_code=status.HTTP_200_OK,
+)
+def export_registrations(
+    _: Request,
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    database: Session = Depends(get_db),
+) -> StreamingResponse:
     """
-    List existing registrations.
+    Export all existing registrations. The response is streamed as rows are
+    read from the database, rather than being built up in memory.
     """
 
     try:
-        registrations = get(database, params)
+        records = export(database)
     except DBAPIError as err:
         raise InternalServerError(err) from err
 
-    return registrations.items  # type: ignore[attr-defined]
+    rows = (get_export_row(record) for record in records)
+    if export_format is ExportFormat.CSV:
+        lines = stream_csv_rows(EXPORT_FIELDS, rows)
+        media_type = "text/csv"
+    else:
+        lines = (dumps(row) + "\n" for row in rows)
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(
+        join_batches(lines),
+        headers={
+            "Content-Disposition": f"attachment; filename=registrations.{export_format.value}"
+        },
+        media_type=media_type,
+    )
+
+
+def get_export_row(record: RegistrationORM) -> Dict[str, Optional[str]]:
+    """
+    Convert a registration into a flat, JSON-serializable dictionary,
+    without re-validating it.
+    """
+
+    row = {}
+    for field in EXPORT_FIELDS:
+        value = getattr(record, field)
+        row[field] = value.isoformat() if isinstance(value, datetime) else value
+
+    return row
+
+
+def join_batches(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Combine exported lines into chunks of up to `EXPORT_BATCH_SIZE` lines,
+    to avoid sending a separate response message per row.
+    """
+
+    batch: List[str] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield "".join(batch)
+            batch = []
+
+    if batch:
+        yield "".join(batch)
 
 
 @registration_router.post(
@@ -52,6 +203,7 @@ async def list_registrations(
     responses={
         status.HTTP_429_TOO_MANY_REQUESTS: TooManyRequestsError.doc(),
         status.HTTP_500_INTERNAL_SERVER_ERROR: InternalServerError.doc(),
+        status.HTTP_503_SERVICE_UNAVAILABLE: ServiceUnavailableError.doc(),
     },
     status_code=status.HTTP_201_CREATED,
 )
@@ -79,6 +231,7 @@ async def add_registration(
         status.HTTP_404_NOT_FOUND: NotFoundError.doc(),
         status.HTTP_429_TOO_MANY_REQUESTS: TooManyRequestsError.doc(),
         status.HTTP_500_INTERNAL_SERVER_ERROR: InternalServerError.doc(),
+        status.HTTP_503_SERVICE_UNAVAILABLE: ServiceUnavailableError.doc(),
     },
     response_model=Registration,
     status_code=status.HTTP_200_OK,
@@ -108,6 +261,7 @@ async def modify_registration(
         status.HTTP_404_NOT_FOUND: NotFoundError.doc(),
         status.HTTP_429_TOO_MANY_REQUESTS: TooManyRequestsError.doc(),
         status.HTTP_500_INTERNAL_SERVER_ERROR: InternalServerError.doc(),
+        status.HTTP_503_SERVICE_UNAVAILABLE: ServiceUnavailableError.doc(),
     },
     status_code=status.HTTP_204_NO_CONTENT,
 )
@@ -6,8 +6,11 @@ from typing import Dict, List, Optional
 from pydantic import BaseModel, Field, validator
 from validators import url as is_valid_url
 
+from ..config import config
+from ..database.endpoint_templates import ID_SEGMENT
+from ..tracing import span
 from .manifest_file_counts import ManifestFileCounts
-from .validation import check_in_the_past, check_not_an_email_address
+from .validation import ValidationCache, check_in_the_past, check_not_an_email_address
 
 ALLOWED_HTTP_METHODS = [
     "CONNECT",
@@ -22,6 +25,48 @@ ALLOWED_HTTP_METHODS = [
 ]
 
 
+def check_endpoint_url(endpoint: str) -> bool:
+    """
+    Return whether the URL of a normalized `endpoint` is valid. Hosts without
+    a top-level domain, such as `localhost` and `0.0.0.0`, are allowed, as are
+    URLs already truncated to their path by the client.
+    """
+
+    url = endpoint.split(": ", maxsplit=1)[1]
+    if url.startswith("/"):
+        url = f"http://localhost{url}"
+
+    return bool(is_valid_url(url, simple_host=True))
+
+
+def get_endpoint_cache_key(endpoint: str) -> str:
+    """
+    Return the part of a normalized `endpoint` on which its validity is cached:
+    its HTTP method, and its URL without the query or fragment, which are never
+    stored. Segments of the path that identify a resource are replaced by `0`,
+    which is just as valid, so that requests for each resource of a route share
+    a cache entry.
+    """
+
+    http_method, url = endpoint.split(": ", maxsplit=1)
+    url = url.split("#", maxsplit=1)[0].split("?", maxsplit=1)[0]
+
+    scheme_end = url.find("://")
+    path_start = url.find("/", scheme_end + 3) if scheme_end >= 0 else 0
+    if path_start < 0:
+        return f"{http_method}: {url}"
+
+    return f"{http_method}: {url[:path_start]}{ID_SEGMENT.sub('0', url[path_start:])}"
+
+
+# Most events from a given install are sent for the same few endpoints
+endpoint_cache = ValidationCache(
+    "endpoint",
+    check_endpoint_url,
+    config.cache.endpoint_max_entries,
+)
+
+
 class AnalyticsEvent(BaseModel):
     """The schema for analytics events."""
 
@@ -43,7 +88,7 @@ class AnalyticsEvent(BaseModel):
     )
     endpoint: Optional[str] = Field(
         None,
-        description="For events submitted as a result of making API server requests, the HTTP method and full API endpoint URL included on the request, delimited by a colon. Ex: `GET: https://www.example.com/api/path`. The URL will be truncated, and only the URL path will be stored.",
+        description="For events submitted as a result of making API server requests, the HTTP method and full API endpoint URL included on the request, delimited by a colon. Ex: `GET: https://www.example.com/api/path`. The URL will be truncated, and only the URL path will be stored, so the URL may also be truncated before it is sent. Ex: `GET: /api/path`.",
     )
     error: Optional[str] = Field(
         None,
@@ -84,6 +129,19 @@ class AnalyticsEvent(BaseModel):
         description="For events submitted as a result of making API server requests, the HTTP status code included in the response.",
     )
 
+    @classmethod
+    def validate(cls, value: object) -> "AnalyticsEvent":
+        """
+        Time the validation of request and response bodies, which FastAPI
+        performs before and after calling the route handler.
+
+        FastAPI validates responses against a subclass of the `response_model`,
+        so the two are recorded as separate stages.
+        """
+
+        with span("validate" if cls is AnalyticsEvent else "validate_response"):
+            return super().validate(value)
+
     _check_not_an_email_address: classmethod = validator(
         "client_id",
         allow_reuse=True,
@@ -99,9 +157,9 @@ class AnalyticsEvent(BaseModel):
         """
         Ensure that `endpoint` contains the request's HTTP method and URL.
 
-        If the URL contains the host `0.0.0.0` this validation would fail,
-        so it's replaced with `localhost` to ensure the URL can be legitimately
-        validated. The host is never stored in the databse, so it doesn't matter.
+        Validating a URL is relatively slow, so the results for recently seen
+        endpoints are cached. The query and fragment of the URL are discarded
+        before the endpoint is stored, so they are not validated.
         """
 
         if value is None:
@@ -117,12 +175,12 @@ class AnalyticsEvent(BaseModel):
             http_method in ALLOWED_HTTP_METHODS
         ), f"HTTP method must be one of {', '.join(ALLOWED_HTTP_METHODS)}"
 
-        url = endpoint_components[1].strip()
-        assert is_valid_url(
-            url.replace("://0.0.0.0", "://localhost", 1)
+        endpoint = f"{http_method}: {endpoint_components[1].strip()}"
+        assert endpoint_cache.is_valid(
+            get_endpoint_cache_key(endpoint)
         ), "endpoint URL must be a valid URL"
 
-        return f"{http_method}: {url}"
+        return endpoint
 
     @validator("flags", each_item=True)
     def check_no_values(cls, value: str) -> str:
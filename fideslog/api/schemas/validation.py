@@ -1,4 +1,9 @@
+from collections import OrderedDict
 from datetime import datetime, timezone
+from threading import Lock
+from typing import Callable
+
+from ..metrics import VALIDATION_CACHE
 
 
 def check_not_an_email_address(value: str) -> str:
@@ -18,3 +23,46 @@ def check_in_the_past(value: datetime) -> datetime:
     assert value.tzname() == str(timezone.utc), "date must be an explicit UTC timestamp"
     assert value < datetime.now(timezone.utc), "date must be in the past"
     return value
+
+
+class ValidationCache:
+    """
+    Remembers whether each of the `max_entries` most recently checked values
+    passed `check`, so that repeated values are only checked once. Hits and
+    misses are counted by the `fideslog_validation_cache_total` metric.
+    """
+
+    def __init__(self, name: str, check: Callable[[str], bool], max_entries: int):
+        self.name = name
+        self.check = check
+        self.max_entries = max_entries
+        self.results: "OrderedDict[str, bool]" = OrderedDict()
+        self.lock = Lock()
+
+    def is_valid(self, value: str) -> bool:
+        """Return the result of `check` for `value`, checking it if necessary."""
+
+        with self.lock:
+            result = self.results.get(value)
+            if result is not None:
+                self.results.move_to_end(value)
+
+        if result is not None:
+            VALIDATION_CACHE.inc(self.name, "hit")
+            return result
+
+        VALIDATION_CACHE.inc(self.name, "miss")
+        result = self.check(value)
+        if self.max_entries:
+            with self.lock:
+                self.results[value] = result
+                while len(self.results) > self.max_entries:
+                    self.results.popitem(last=False)
+
+        return result
+
+    def clear(self) -> None:
+        """Forget all results."""
+
+        with self.lock:
+            self.results.clear()
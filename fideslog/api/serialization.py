@@ -0,0 +1,57 @@
+# pylint: disable=import-outside-toplevel
+
+from json import dumps
+from logging import getLogger
+from typing import Callable, Tuple, Type
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from .config import config
+
+log = getLogger(__name__)
+
+Encoder = Callable[[object], bytes]
+
+
+def use_orjson(json_encoder: str) -> bool:
+    """
+    Return whether to serialize response bodies with orjson. If `json_encoder`
+    is `auto`, orjson is used only if it is installed.
+    """
+
+    if json_encoder == "stdlib":
+        return False
+
+    try:
+        import orjson  # pylint: disable=unused-import
+    except ImportError:
+        if json_encoder == "orjson":
+            raise
+
+        log.debug("orjson is not installed, so responses will be encoded by json")
+        return False
+
+    return True
+
+
+def encode_with_json(content: object) -> bytes:
+    """Render `content` as compact JSON, with the standard library encoder."""
+
+    return dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def select_encoder(json_encoder: str) -> Tuple[Encoder, Type[JSONResponse]]:
+    """
+    Return the encoder and response class to use for JSON response bodies,
+    given the configured `json_encoder`.
+    """
+
+    if use_orjson(json_encoder):
+        import orjson
+
+        return orjson.dumps, ORJSONResponse
+
+    return encode_with_json, JSONResponse
+
+
+encode, response_class = select_encoder(config.server.json_encoder)
@@ -0,0 +1,252 @@
+"""
+Profile the startup of the API server and the Python SDK, reporting the time
+taken by each phase of initialization and by each imported module as JSON.
+
+Each target is profiled in a fresh interpreter, started with `-X importtime`,
+so that no module is already imported. The configuration is loaded as it
+would be by the API server, so any required options must be set.
+
+Usage: python -m fideslog.api.startup_profile [--target {api,sdk}] [--top 50]
+    [--output FILE]
+"""
+
+import json
+import subprocess
+import sys
+from argparse import ArgumentParser
+from collections import defaultdict
+from importlib import import_module
+from platform import python_version
+from tempfile import NamedTemporaryFile
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+IMPORT_TIME_PREFIX = "import time:"
+START_MARKER = "fideslog: profiling started"
+
+Profile = Dict[str, object]
+
+
+class ModuleImport(NamedTuple):
+    """The time taken to import a module, as reported by `-X importtime`."""
+
+    name: str
+    self_us: int
+    cumulative_us: int
+
+
+def import_modules(*names: str) -> Callable[[], None]:
+    """Return a phase that imports each of `names`, in order."""
+
+    def phase() -> None:
+        for name in names:
+            import_module(name)
+
+    return phase
+
+
+def run_api_startup_events() -> None:
+    """Run the API server's startup and shutdown event handlers."""
+
+    # pylint: disable=import-outside-toplevel
+    from asyncio import run
+
+    from fideslog.api.main import app
+
+    async def start_and_stop() -> None:
+        await app.router.startup()
+        await app.router.shutdown()
+
+    run(start_and_stop())
+
+
+def create_sdk_client() -> None:
+    """Create an analytics client and an event, as an SDK user would."""
+
+    # pylint: disable=import-outside-toplevel
+    from datetime import datetime, timezone
+
+    from fideslog.sdk.python.client import AnalyticsClient
+    from fideslog.sdk.python.event import AnalyticsEvent
+
+    AnalyticsClient("client_id", "linux", "fidesctl", "1.0.0")
+    AnalyticsEvent(
+        "cli_command_executed",
+        datetime.now(timezone.utc),
+        command="fidesctl status",
+        status_code=0,
+    )
+
+
+# The phases of initializing each target, which are timed in order. Modules
+# imported by an earlier phase are not imported again, or timed, by later ones.
+TARGETS: Dict[str, List[Tuple[str, Callable[[], None]]]] = {
+    "api": [
+        (
+            "import_dependencies",
+            import_modules(
+                "pydantic",
+                "fastapi",
+                "uvicorn",
+                "sqlalchemy",
+                "boto3",
+            ),
+        ),
+        ("load_config", import_modules("fideslog.api.config")),
+        (
+            "import_schemas",
+            import_modules(
+                "fideslog.api.schemas.analytics_event",
+                "fideslog.api.schemas.registration",
+            ),
+        ),
+        ("import_database", import_modules("fideslog.api.database")),
+        ("build_routes", import_modules("fideslog.api.router")),
+        ("build_app", import_modules("fideslog.api.main")),
+        ("run_startup_events", run_api_startup_events),
+    ],
+    "sdk": [
+        ("import_dependencies", import_modules("aiohttp", "bcrypt", "validators")),
+        ("import_package", import_modules("fideslog.sdk.python")),
+        (
+            "import_client",
+            import_modules(
+                "fideslog.sdk.python.client",
+                "fideslog.sdk.python.utils",
+            ),
+        ),
+        ("create_client", create_sdk_client),
+    ],
+}
+TARGET_MODULES = {"api": "fideslog.api.main", "sdk": "fideslog.sdk.python"}
+
+
+def time_phases(target: str) -> Dict[str, int]:
+    """Run each phase of initializing `target`, returning its duration in µs."""
+
+    durations = {}
+    for name, phase in TARGETS[target]:
+        start = perf_counter()
+        phase()
+        durations[name] = round((perf_counter() - start) * 1e6)
+
+    return durations
+
+
+def parse_import_times(output: str) -> Iterator[ModuleImport]:
+    """
+    Yield each module import reported by `-X importtime` in `output`,
+    after the `START_MARKER` line.
+    """
+
+    lines = iter(output.splitlines())
+    for line in lines:
+        if line == START_MARKER:
+            break
+
+    for line in lines:
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+
+        self_us, cumulative_us, name = line[len(IMPORT_TIME_PREFIX) :].split("|")
+        if self_us.strip().isdigit():
+            yield ModuleImport(name.strip(), int(self_us), int(cumulative_us))
+
+
+def summarize(
+    target: str,
+    phases: Dict[str, int],
+    imports: List[ModuleImport],
+    top: int,
+) -> Profile:
+    """
+    Combine the phase durations and module import times of `target` into
+    a profile. Import times are also totalled per top-level package.
+    """
+
+    packages: Dict[str, int] = defaultdict(int)
+    for module in imports:
+        packages[module.name.split(".")[0]] += module.self_us
+
+    modules = sorted(imports, key=lambda module: module.cumulative_us, reverse=True)
+    return {
+        "target": TARGET_MODULES[target],
+        "python": python_version(),
+        "total_us": sum(phases.values()),
+        "import_us": sum(module.self_us for module in imports),
+        "phases": [{"name": name, "us": us} for name, us in phases.items()],
+        "packages": [
+            {"name": name, "self_us": us}
+            for name, us in sorted(packages.items(), key=lambda item: -item[1])
+        ],
+        "modules": [module._asdict() for module in modules[: top or None]],
+    }
+
+
+def profile(target: str, top: int) -> Profile:
+    """Profile `target` in a new interpreter."""
+
+    with NamedTemporaryFile("r", suffix=".json") as phases_file:
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-m",
+                "fideslog.api.startup_profile",
+                "--phases-of",
+                target,
+                "--output",
+                phases_file.name,
+            ],
+            capture_output=True,
+            check=False,
+            text=True,
+        )
+        if result.returncode != 0:
+            errors = [
+                line
+                for line in result.stderr.splitlines()
+                if not line.startswith(IMPORT_TIME_PREFIX)
+            ]
+            raise RuntimeError(f"Failed to profile {target}:\n" + "\n".join(errors))
+
+        phases = json.load(phases_file)
+
+    return summarize(target, phases, list(parse_import_times(result.stderr)), top)
+
+
+def main() -> None:
+    """Profile each requested target, and write the profiles as JSON."""
+
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--target",
+        action="append",
+        choices=TARGETS,
+        dest="targets",
+        help="Defaults to all targets",
+    )
+    parser.add_argument("--top", type=int, default=50, help="0 to include all")
+    parser.add_argument("--output", help="Defaults to standard output")
+    parser.add_argument("--phases-of", choices=TARGETS, help="Used internally")
+    args = parser.parse_args()
+
+    if args.phases_of:
+        print(START_MARKER, file=sys.stderr, flush=True)
+        results: object = time_phases(args.phases_of)
+    else:
+        results = {
+            TARGET_MODULES[target]: profile(target, args.top)
+            for target in args.targets or TARGETS
+        }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from json import dumps
+from secrets import token_hex
+from time import perf_counter_ns, time_ns
+from typing import Dict, Iterator, Optional, Union
+
+from .config import config
+from .logger import handle_in_background, stop_handling_in_background
+from .metrics import STAGE_DURATION
+
+SpanAttributes = Dict[str, Union[bool, float, int, str, None]]
+
+log = logging.getLogger(__name__)
+log.propagate = False
+log.setLevel(logging.INFO)
+
+
+def configure_tracing(destination: Optional[str], queue_size: int) -> None:
+    """
+    Write spans to the `destination` file, or stop writing them if it is not
+    set. Like log records, spans are written by a background thread, through
+    a queue of up to `queue_size` spans.
+    """
+
+    stop_handling_in_background(log)
+    log.disabled = not destination
+    if destination:
+        handler = logging.FileHandler(destination)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handle_in_background(log, handler, queue_size)
+
+
+configure_tracing(config.tracing.destination, config.logging.queue_size)
+
+
+class SpanContext:
+    """Identifies a span, the trace to which it belongs, and its parent span."""
+
+    def __init__(self, parent: Optional["SpanContext"], name: str) -> None:
+        self.name = name
+        self.trace_id: str = parent.trace_id if parent else token_hex(16)
+        self.span_id: str = token_hex(8)
+        self.parent_id: Optional[str] = parent.span_id if parent else None
+        self.start_time = time_ns()
+
+
+current_span: ContextVar[Optional[SpanContext]] = ContextVar(
+    "current_span",
+    default=None,
+)
+
+
+@contextmanager
+def span(name: str) -> Iterator[SpanAttributes]:
+    """
+    Time a stage of handling a request, recording its duration in the
+    `STAGE_DURATION` metric.
+
+    If a tracing `destination` is configured, the stage is also written to it as
+    a span, in a single line of JSON. Spans started while another is in progress
+    share its trace, and record it as their parent. The yielded dictionary may be
+    used to add attributes to the span.
+    """
+
+    attributes: SpanAttributes = {}
+    context: Optional[SpanContext] = None
+    token: Optional["Token[Optional[SpanContext]]"] = None
+    if not log.disabled:
+        context = SpanContext(current_span.get(), name)
+        token = current_span.set(context)
+
+    start = perf_counter_ns()
+    try:
+        yield attributes
+    except Exception as err:
+        attributes["error"] = type(err).__name__
+        raise
+    finally:
+        duration = perf_counter_ns() - start
+        STAGE_DURATION.observe(duration / 1e9, name)
+
+        if context is not None and token is not None:
+            current_span.reset(token)
+            export_span(context, duration, attributes)
+
+
+def export_span(
+    context: "SpanContext", duration: int, attributes: SpanAttributes
+) -> None:
+    """Write a completed span to the tracing `destination`, as a line of JSON."""
+
+    log.info(
+        dumps(
+            {
+                "name": context.name,
+                "trace_id": context.trace_id,
+                "span_id": context.span_id,
+                "parent_id": context.parent_id,
+                "start_time": context.start_time,
+                "duration_ns": duration,
+                "attributes": attributes,
+            }
+        )
+    )
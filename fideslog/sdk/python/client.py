@@ -1,6 +1,7 @@
-# pylint: disable=import-outside-toplevel, too-many-arguments
+# pylint: disable=import-outside-toplevel, too-many-arguments, too-many-instance-attributes
 
 from asyncio import run
+from json import dumps
 from sys import platform, version_info
 from typing import Dict, Optional, Union
 
@@ -10,9 +11,10 @@ from aiohttp import (
     ClientSession,
     ClientTimeout,
 )
+from aiohttp.typedefs import JSONEncoder
 
 from . import __version__
-from .event import AnalyticsEvent
+from .event import AnalyticsEvent, truncate_endpoint_url
 from .exceptions import (
     AnalyticsSendError,
     InvalidClientError,
@@ -21,6 +23,7 @@ from .exceptions import (
 )
 from .registration import Registration
 
+CLIENT_ID_HEADER = "X-Fideslog-Client-Id"
 REQUIRED_HEADERS = {"X-Fideslog-Version": __version__}
 
 
@@ -40,6 +43,8 @@ class AnalyticsClient:
         production_version: str,
         developer_mode: bool = False,
         extra_data: Optional[Dict] = None,
+        truncate_endpoints: bool = False,
+        json_serialize: JSONEncoder = dumps,
     ) -> None:
         """
         Define a new client from which to send analytics events to the fideslog server.
@@ -50,6 +55,8 @@ class AnalyticsClient:
         :param production_version: The semantic version number of the fides tool in which this client is integrated.
         :param extra_data: Any additional information that should be included in all analytics events sent by this client. Any key/value pairs included here will be merged with key/value pairs included directly on specific `AnalyticsEvent`s, with the `AnalyticsEvent`'s `extra_data` taking priority.
         :param developer_mode: `True` if this client exists for the purposes of local development. Default: `False`.
+        :param truncate_endpoints: `True` to send only the path of each event's `endpoint` URL, which is all that the fideslog server stores. Requires a fideslog server that accepts truncated endpoints. Default: `False`.
+        :param json_serialize: The function with which to serialize request bodies as JSON strings. A faster encoder may be used, such as `lambda body: orjson.dumps(body).decode()`. Default: `json.dumps`.
         """
 
         try:
@@ -66,6 +73,17 @@ class AnalyticsClient:
         self.production_version = production_version
         self.developer_mode = developer_mode
         self.extra_data = extra_data or {}
+        self.truncate_endpoints = truncate_endpoints
+        self.json_serialize = json_serialize
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """
+        The headers sent with every request. The client ID allows the server
+        to rate limit each client without parsing the request body.
+        """
+
+        return {**REQUIRED_HEADERS, CLIENT_ID_HEADER: self.client_id}
 
     def register(self, registration: Registration) -> None:
         """
@@ -100,7 +118,8 @@ class AnalyticsClient:
 
         async with ClientSession(
             self.server_url,
-            headers=REQUIRED_HEADERS,
+            headers=self.headers,
+            json_serialize=self.json_serialize,
             timeout=ClientTimeout(connect=3.05, total=120),
         ) as session:
             try:
@@ -157,19 +176,13 @@ class AnalyticsClient:
             "production_version": self.production_version,
         }
 
-        payload_extras = [
-            "command",
-            "endpoint",
-            "error",
-            "flags",
-            "resource_counts",
-            "status_code",
-        ]
-
-        event_dict = vars(event)
-        for extra in payload_extras:
-            if event_dict[extra]:
-                payload[extra] = event_dict[extra]
+        for extra in AnalyticsEvent.PAYLOAD_EXTRAS:
+            value = getattr(event, extra)
+            if value:
+                payload[extra] = value
+
+        if self.truncate_endpoints and event.endpoint:
+            payload["endpoint"] = truncate_endpoint_url(event.endpoint)
 
         return payload
 
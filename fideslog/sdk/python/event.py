@@ -1,7 +1,9 @@
 # pylint: disable= too-many-arguments, too-many-instance-attributes, too-many-locals
 
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
 from validators import url as is_valid_url
 
@@ -20,11 +22,64 @@ ALLOWED_HTTP_METHODS = [
 ]
 
 
+@lru_cache(maxsize=256)
+def is_valid_endpoint(endpoint: str) -> bool:
+    """
+    Returns whether the URL of a normalized `endpoint` is valid. Hosts without
+    a top-level domain, such as `localhost` and `0.0.0.0`, are allowed, as are
+    URLs already truncated to their path.
+
+    Validating a URL is relatively slow, and applications usually send events
+    for the same few endpoints, so results are cached. Call `cache_info()` on
+    this function for the cache's hit and miss counts.
+    """
+
+    url = endpoint.split(": ", maxsplit=1)[1]
+    if url.startswith("/"):
+        url = f"http://localhost{url}"
+
+    return bool(is_valid_url(url, simple_host=True))
+
+
+def truncate_endpoint_url(endpoint: str) -> str:
+    """
+    Removes all but the path from the URL of a normalized `endpoint`, as the
+    fideslog server does before storing it.
+    """
+
+    http_method, url = endpoint.split(": ", maxsplit=1)
+    return f"{http_method}: {urlparse(url).path}"
+
+
 class AnalyticsEvent:
     """
     A discrete event, representing a user action within a fides tool.
     """
 
+    __slots__ = (
+        "command",
+        "docker",
+        "endpoint",
+        "error",
+        "event",
+        "event_created_at",
+        "extra_data",
+        "flags",
+        "local_host",
+        "resource_counts",
+        "status_code",
+    )
+
+    # The attributes included in the request payload only when they have a value
+    PAYLOAD_EXTRAS = (
+        "command",
+        "endpoint",
+        "error",
+        "flags",
+        "resource_counts",
+        "status_code",
+    )
+
     def __init__(
         self,
         event: str,
@@ -145,9 +200,7 @@ class AnalyticsEvent:
             http_method in ALLOWED_HTTP_METHODS
         ), f"HTTP method must be one of: {', '.join(ALLOWED_HTTP_METHODS)}"
 
-        url = endpoint_components[1].strip()
-        assert is_valid_url(
-            url.replace("://0.0.0.0", "://localhost", 1)
-        ), "endpoint URL must be a valid URL"
+        endpoint = f"{http_method}: {endpoint_components[1].strip()}"
+        assert is_valid_endpoint(endpoint), "endpoint URL must be a valid URL"
 
-        return (f"{http_method}: {url}", local_host)
+        return (endpoint, local_host)
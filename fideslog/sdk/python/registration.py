@@ -8,6 +8,8 @@ class Registration:
     Represents a user registering their information.
     """
 
+    __slots__ = ("created_at", "email", "organization", "updated_at")
+
     def __init__(
         self,
         email: str,
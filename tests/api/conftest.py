@@ -0,0 +1,73 @@
+from datetime import timezone
+from pathlib import Path
+from typing import Dict, Generator, List
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+
+from fideslog.api.models.models import Base
+from fideslog.api.models.models import Registration as RegistrationORM
+
+
+class RecordingStorage:
+    """
+    Stands in for both a boto3 session and the S3 client it creates, recording
+    the objects that would have been written to storage.
+    """
+
+    def __init__(self) -> None:
+        self.objects: List[Dict[str, object]] = []
+
+    def client(self, *_: object, **__: object) -> "RecordingStorage":
+        return self
+
+    def put_object(self, **kwargs: object) -> None:
+        self.objects.append(kwargs)
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture()
+def storage() -> RecordingStorage:
+    """Return an empty stand-in for the event storage."""
+
+    return RecordingStorage()
+
+
+@pytest.fixture()
+def sqlite_session(tmp_path: Path) -> Generator:
+    """
+    Yield a session of an empty SQLite database, with the API server's tables.
+    """
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'fideslog.db'}",
+        # Synchronous routes use the session from another thread
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+    session: Session = sessionmaker(bind=engine)()
+    event.listen(RegistrationORM, "load", restore_utc)
+    event.listen(RegistrationORM, "refresh", restore_utc)
+
+    yield session
+
+    event.remove(RegistrationORM, "load", restore_utc)
+    event.remove(RegistrationORM, "refresh", restore_utc)
+    session.close()
+    engine.dispose()
+
+
+def restore_utc(record: RegistrationORM, *_: object) -> None:
+    """
+    SQLite does not store time zones, so mark the timestamps of a loaded
+    registration as UTC, as they are when read from Snowflake.
+    """
+
+    for field in ("created_at", "updated_at"):
+        value = getattr(record, field)
+        if value is not None and value.tzinfo is None:
+            set_committed_value(record, field, value.replace(tzinfo=timezone.utc))
@@ -0,0 +1,178 @@
+# pylint: disable=redefined-outer-name
+
+import time
+from asyncio import gather, run, sleep
+from threading import get_ident
+from typing import Generator, List, Optional
+
+import pytest
+
+from fideslog.api.cache import (
+    CacheBackend,
+    CachedResponse,
+    MemoryBackend,
+    ResponseCache,
+)
+
+
+class UnavailableBackend(CacheBackend):
+    """A backend whose storage cannot be reached."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise ConnectionError("Connection refused")
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        raise ConnectionError("Connection refused")
+
+    def clear(self) -> None:
+        raise ConnectionError("Connection refused")
+
+
+class SlowBackend(MemoryBackend):
+    """A blocking backend, which records the threads from which it is cleared."""
+
+    blocking = True
+
+    def __init__(self) -> None:
+        super().__init__(max_entries=2)
+        self.cleared_in: List[int] = []
+
+    def clear(self) -> None:
+        time.sleep(0.05)
+        self.cleared_in.append(get_ident())
+        super().clear()
+
+
+@pytest.fixture()
+def response_cache() -> Generator:
+    """
+    Yield an empty, in-process ResponseCache.
+    """
+
+    yield ResponseCache(MemoryBackend(max_entries=2), ttl=60)
+
+
+class TestMemoryBackend:
+    def test_evicts_least_recently_used(self) -> None:
+        """
+        Test that the least recently used value is evicted once the backend is full.
+        """
+
+        backend = MemoryBackend(max_entries=2)
+        backend.set("a", b"a", ttl=60)
+        backend.set("b", b"b", ttl=60)
+        backend.get("a")
+        backend.set("c", b"c", ttl=60)
+
+        assert backend.get("a") == b"a"
+        assert backend.get("b") is None
+        assert backend.get("c") == b"c"
+
+    def test_expires_values(self) -> None:
+        """
+        Test that values are not returned once their TTL has passed.
+        """
+
+        backend = MemoryBackend(max_entries=2)
+        backend.set("a", b"a", ttl=0)
+
+        assert backend.get("a") is None
+
+
+class TestResponseCache:
+    def test_etag_identifies_content(self) -> None:
+        """
+        Test that entity tags are equal only for equal response bodies.
+        """
+
+        response = CachedResponse.from_body(b"[]")
+
+        assert response.etag == CachedResponse.from_body(b"[]").etag
+        assert response.etag != CachedResponse.from_body(b"[{}]").etag
+        assert CachedResponse.decode(response.encode()) == response
+
+    def test_coalesces_concurrent_loads(self, response_cache: ResponseCache) -> None:
+        """
+        Test that concurrent requests for the same key share a single load.
+        """
+
+        loads = []
+
+        async def load() -> bytes:
+            loads.append(None)
+            await sleep(0.01)
+            return b"[]"
+
+        async def request_concurrently() -> list:
+            return await gather(
+                *(response_cache.get_or_load("key", load) for _ in range(5))
+            )
+
+        responses = run(request_concurrently())
+
+        assert len(loads) == 1
+        assert len(set(responses)) == 1
+
+    def test_invalidate(self, response_cache: ResponseCache) -> None:
+        """
+        Test that invalidating the cache causes the next request to be loaded.
+        """
+
+        bodies = iter([b"[1]", b"[2]"])
+
+        async def load() -> bytes:
+            return next(bodies)
+
+        first = run(response_cache.get_or_load("key", load))
+        assert run(response_cache.get_or_load("key", load)) == first
+
+        response_cache.invalidate()
+        assert run(response_cache.get_or_load("key", load)).body == b"[2]"
+
+    def test_invalidate_unavailable_backend(self) -> None:
+        """
+        Test that failing to clear the backend does not fail the change
+        that caused the invalidation.
+        """
+
+        response_cache = ResponseCache(UnavailableBackend(), ttl=60)
+        response_cache.invalidate()
+
+        assert response_cache.generation == 1
+
+    def test_unavailable_backend(self) -> None:
+        """
+        Test that responses are loaded if the backend cannot be read from or
+        written to.
+        """
+
+        response_cache = ResponseCache(UnavailableBackend(), ttl=60)
+
+        async def load() -> bytes:
+            return b"[]"
+
+        response = run(response_cache.get_or_load("key", load))
+
+        assert response.body == b"[]"
+
+    def test_invalidate_blocking_backend(self) -> None:
+        """
+        Test that a blocking backend is cleared outside of the event loop, and
+        that later requests wait for it to be cleared.
+        """
+
+        backend = SlowBackend()
+        backend.set("key", CachedResponse.from_body(b"[1]").encode(), ttl=60)
+        response_cache = ResponseCache(backend, ttl=60)
+
+        async def load() -> bytes:
+            return b"[2]"
+
+        async def change_and_request() -> CachedResponse:
+            response_cache.invalidate()
+            assert not backend.cleared_in
+            return await response_cache.get_or_load("key", load)
+
+        assert run(change_and_request()).body == b"[2]"
+        assert backend.cleared_in
+        assert backend.cleared_in[0] != get_ident()
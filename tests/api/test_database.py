@@ -0,0 +1,385 @@
+# pylint: disable=redefined-outer-name
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from subprocess import check_output
+from typing import Any, Generator, List
+
+import pytest
+from fastapi_pagination import Params
+from pydantic import ValidationError
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects.postgresql.base import PGDialect
+from sqlalchemy.dialects.sqlite.base import SQLiteDialect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import Select
+
+from fideslog.api import database
+from fideslog.api.config import DatabaseSettings, config
+from fideslog.api.database import ping_idle_connections, warm_up_pool
+from fideslog.api.database.endpoint_templates import EndpointTemplates
+from fideslog.api.database.events import create, truncate_endpoint_url
+from fideslog.api.database.registrations import backfill_email_index
+from fideslog.api.database.registrations import create as create_registration
+from fideslog.api.database.registrations import email_blind_index, get
+from fideslog.api.database.statements import precompiled
+from fideslog.api.models.models import EncryptedString
+from fideslog.api.models.models import Registration as RegistrationORM
+from fideslog.api.schemas.analytics_event import AnalyticsEvent
+from fideslog.api.schemas.registration import Registration
+
+
+class TestCreateEvent:
+    def test_only_the_endpoint_path_is_stored(self, storage: Any) -> None:
+        """
+        Test that the stored endpoint is truncated to its path, without
+        changing the event returned in the response.
+        """
+
+        event = AnalyticsEvent(
+            client_id="test_client_id",
+            endpoint="GET: https://www.example.com/api/v1/path?query=value",
+            event="endpoint_call",
+            event_created_at=datetime(2022, 2, 21, tzinfo=timezone.utc),
+            local_host=False,
+            os="darwin",
+            product_name="test_product",
+            production_version="1.2.3",
+        )
+
+        create(storage, "bucket", event)  # type: ignore
+
+        body = storage.objects[0]["Body"]
+        assert isinstance(body, bytes)
+        assert b"GET: /api/v1/path," in body
+        assert b"example.com" not in body
+        assert event.endpoint == "GET: https://www.example.com/api/v1/path?query=value"
+
+    @pytest.mark.parametrize(
+        "template_endpoints,expected",
+        [
+            (False, "GET: /api/v1/privacy-request/42/log"),
+            (True, "GET: /api/v1/privacy-request/{id}/log"),
+        ],
+    )
+    def test_endpoint_templates_are_opt_in(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        template_endpoints: bool,
+        expected: str,
+    ) -> None:
+        """
+        Test that identifiers are only replaced in stored endpoints when
+        `template_endpoints` is enabled.
+        """
+
+        monkeypatch.setattr(config.events, "template_endpoints", template_endpoints)
+
+        assert (
+            truncate_endpoint_url(
+                "GET: https://www.example.com/api/v1/privacy-request/42/log",
+                "test_product",
+            )
+            == expected
+        )
+
+
+class TestEmailBlindIndex:
+    def test_blind_index_is_deterministic(self) -> None:
+        """
+        Test that equal email addresses always produce the same index value.
+        """
+
+        assert email_blind_index("johndoe@example.com") == email_blind_index(
+            "johndoe@example.com"
+        )
+
+    def test_blind_index_is_normalized(self) -> None:
+        """
+        Test that case and surrounding whitespace do not affect the index value.
+        """
+
+        assert email_blind_index(" JohnDoe@Example.com ") == email_blind_index(
+            "johndoe@example.com"
+        )
+
+    def test_blind_index_does_not_contain_email(self) -> None:
+        """
+        Test that the index value does not reveal the email address.
+        """
+
+        index = email_blind_index("johndoe@example.com")
+        assert "johndoe" not in index
+        assert index != email_blind_index("janedoe@example.com")
+
+
+@pytest.fixture()
+def registrations(sqlite_session: Session) -> Generator:
+    """
+    Yield a database containing five registrations, each more recent than the
+    last, of which the second and fourth share an email address.
+    """
+
+    for i in range(5):
+        created_at = datetime(2022, 1, i + 1, tzinfo=timezone.utc)
+        create_registration(
+            sqlite_session,
+            Registration(
+                client_id=f"client_{i}",
+                email="shared@example.com" if i in (1, 3) else f"user_{i}@example.com",
+                organization="Ethyca",
+                created_at=created_at,
+                updated_at=created_at,
+            ),
+        )
+
+    yield sqlite_session
+
+
+class TestGetRegistrations:
+    @pytest.mark.parametrize(
+        "page, size, client_ids",
+        [
+            (1, 2, ["client_4", "client_3"]),
+            (3, 2, ["client_0"]),
+            (4, 2, []),
+            (1, 100, ["client_4", "client_3", "client_2", "client_1", "client_0"]),
+        ],
+    )
+    def test_pages(
+        self,
+        registrations: Session,
+        page: int,
+        size: int,
+        client_ids: List[str],
+    ) -> None:
+        """
+        Test that each page contains the expected registrations, most recent
+        first, and that the total counts every registration.
+        """
+
+        result = get(registrations, Params(page=page, size=size))
+
+        assert [r.client_id for r in result.items] == client_ids  # type: ignore
+        assert result.total == 5  # type: ignore
+
+    def test_email_filter(self, registrations: Session) -> None:
+        """
+        Test that both the page and the total only include registrations
+        with the given email address, regardless of its case.
+        """
+
+        first = get(registrations, Params(page=1, size=1), " Shared@Example.com")
+        second = get(registrations, Params(page=2, size=1), "shared@example.com")
+
+        assert [r.client_id for r in first.items] == ["client_3"]  # type: ignore
+        assert [r.client_id for r in second.items] == ["client_1"]  # type: ignore
+        assert first.total == second.total == 2  # type: ignore
+        assert get(registrations, Params(), "nobody@example.com").total == 0  # type: ignore
+
+
+class TestBackfillEmailIndex:
+    def test_indexes_existing_registrations(self, registrations: Session) -> None:
+        """
+        Test that registrations without an email index are indexed in batches,
+        after which they can be found by email address.
+        """
+
+        registrations.query(RegistrationORM).update({"email_index": None})
+        registrations.commit()
+        assert get(registrations, Params(), "shared@example.com").total == 0  # type: ignore
+
+        assert backfill_email_index(registrations, batch_size=2) == 5
+
+        result = get(registrations, Params(), "Shared@Example.com")
+        assert [r.client_id for r in result.items] == ["client_3", "client_1"]  # type: ignore
+        assert backfill_email_index(registrations) == 0
+
+
+class TestPrecompiled:
+    def test_compiles_once_per_dialect(self) -> None:
+        """
+        Test that each statement is built and compiled only once per dialect.
+        """
+
+        calls: List[str] = []
+
+        def build_statement() -> Select:
+            calls.append("build")
+            return select(RegistrationORM.client_id)
+
+        sqlite = precompiled(build_statement, SQLiteDialect())
+        assert precompiled(build_statement, SQLiteDialect()) is sqlite
+        assert len(calls) == 1
+
+        postgresql = precompiled(build_statement, PGDialect())
+        assert postgresql is not sqlite
+        assert precompiled(build_statement, PGDialect()) is postgresql
+        assert len(calls) == 2
+
+
+class TestEndpointTemplates:
+    def test_known_routes(self) -> None:
+        """
+        Test that paths are replaced by the most specific matching route
+        of the event's product.
+        """
+
+        templates = EndpointTemplates(
+            {"fidesops": ["/api/v1/policy/{policy_key}", "/api/v1/policy/rules"]},
+            max_entries=8,
+        )
+
+        assert templates.template("/api/v1/policy/rules", "fidesops") == (
+            "/api/v1/policy/rules"
+        )
+        assert templates.template("/api/v1/policy/my_policy/", "fidesops") == (
+            "/api/v1/policy/{policy_key}"
+        )
+        assert templates.template("/api/v1/policy/my_policy", "fidesctl") == (
+            "/api/v1/policy/my_policy"
+        )
+
+    def test_identifier_segments(self) -> None:
+        """
+        Test that UUIDs, numbers, and long hexadecimal identifiers are
+        replaced when no known route matches.
+        """
+
+        templates = EndpointTemplates({}, max_entries=8)
+        path = (
+            "/api/v1/privacy-request/pri_0d5e2d1a-4b6e-4ad4-9d1e-8bb1a3b1c2d3"
+            "/log/123/0d5e2d1a4b6e4ad49d1e8bb1a3b1c2d3/v1"
+        )
+
+        assert templates.template(path, None) == (
+            "/api/v1/privacy-request/{id}/log/{id}/{id}/v1"
+        )
+
+
+@pytest.fixture()
+def pool_engine(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Generator:
+    """
+    Yield a SQLite engine with a pool of two connections and no overflow,
+    in place of the API server's engine.
+    """
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        connect_args={"check_same_thread": False},
+        max_overflow=0,
+        pool_size=2,
+        pool_timeout=0.1,
+        poolclass=QueuePool,
+    )
+    monkeypatch.setattr(database, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+class TestConnectionPool:
+    def test_warm_up_cannot_exceed_pool_size(self) -> None:
+        """
+        Test that the pool cannot be configured to open more connections
+        at startup than it keeps.
+        """
+
+        assert DatabaseSettings(pool_size=3, pool_warm_up=3).pool_warm_up == 3
+        with pytest.raises(ValidationError) as err:
+            DatabaseSettings(pool_size=1, pool_warm_up=3)
+
+        assert "pool_warm_up must not be greater than pool_size" in str(err.value)
+
+    def test_warm_up_pool(self, pool_engine: Engine) -> None:
+        """
+        Test that warmed up connections are returned to the pool.
+        """
+
+        warm_up_pool(2)
+
+        assert pool_engine.pool.checkedin() == 2
+        assert pool_engine.pool.checkedout() == 0
+
+    def test_warm_up_pool_timeout(self, pool_engine: Engine) -> None:
+        """
+        Test that connections the pool cannot provide are skipped, and that
+        those that were opened are still returned to the pool.
+        """
+
+        warm_up_pool(3)
+
+        assert pool_engine.pool.checkedin() == 2
+        assert pool_engine.pool.checkedout() == 0
+
+    def test_ping_idle_connections(self, pool_engine: Engine) -> None:
+        """
+        Test that live idle connections are kept, and that no connection
+        remains checked out.
+        """
+
+        warm_up_pool(2)
+        ping_idle_connections()
+
+        assert pool_engine.pool.checkedin() == 2
+        assert pool_engine.pool.checkedout() == 0
+
+
+class TestEncryptedString:
+    def test_round_trip(self) -> None:
+        """
+        Test that values are encrypted when bound, and decrypted when loaded.
+        """
+
+        encrypted_string = EncryptedString("key")
+        dialect = SQLiteDialect()
+
+        encrypted = encrypted_string.process_bind_param("johndoe@example.com", dialect)
+        assert encrypted is not None
+        assert "johndoe" not in encrypted
+        assert (
+            encrypted_string.process_result_value(encrypted, dialect)
+            == "johndoe@example.com"
+        )
+
+    def test_literal(self) -> None:
+        """
+        Test that values rendered inline in a statement are encrypted.
+        """
+
+        statement = select(RegistrationORM.client_id).where(
+            RegistrationORM.email == "johndoe@example.com"
+        )
+        sql = str(
+            statement.compile(
+                dialect=SQLiteDialect(),
+                compile_kwargs={"literal_binds": True},
+            )
+        )
+
+        assert "johndoe" not in sql
+        assert EncryptedString("key").python_type is str
+
+
+class TestLazyImports:
+    def test_main_does_not_import_database_dialect(self) -> None:
+        """
+        Test that the Snowflake dialect and `sqlalchemy_utils` are not imported
+        until the database is first used.
+        """
+
+        modules = check_output(
+            [
+                sys.executable,
+                "-c",
+                "import sys, fideslog.api.main; print(' '.join(sys.modules))",
+            ],
+            text=True,
+        ).split()
+
+        assert "fideslog.api.main" in modules
+        assert not [
+            m for m in modules if m.startswith(("snowflake.", "sqlalchemy_utils"))
+        ]
@@ -0,0 +1,99 @@
+import json
+import logging
+from io import StringIO
+from queue import Queue
+
+from fideslog.api.logger import (
+    DroppingQueueHandler,
+    JSONFormatter,
+    background_handlers,
+    handle_in_background,
+    stop_handling_in_background,
+)
+from fideslog.api.metrics import LOG_RECORDS_DROPPED
+
+
+def make_record(message: str) -> logging.LogRecord:
+    """Return a log record as the `fideslog` logger would create it."""
+
+    return logging.LogRecord(
+        "fideslog.api.test", logging.INFO, __file__, 1, message, (), None
+    )
+
+
+class TestLogger:
+    def test_full_queue_drops_records(self) -> None:
+        """
+        Test that records are dropped and counted, rather than blocking,
+        once the queue is full.
+        """
+
+        queue: "Queue[logging.LogRecord]" = Queue(1)
+        handler = DroppingQueueHandler(queue)
+        dropped = LOG_RECORDS_DROPPED.values.get((), 0)
+
+        handler.handle(make_record("first"))
+        handler.handle(make_record("second"))
+
+        assert queue.get_nowait().getMessage() == "first"
+        assert LOG_RECORDS_DROPPED.values[()] == dropped + 1
+
+    def test_json_format(self) -> None:
+        """
+        Test that each record is formatted as a single line of JSON.
+        """
+
+        entry = JSONFormatter().format(make_record('Request "received"\n'))
+
+        assert "\n" not in entry
+        assert json.loads(entry)["message"] == 'Request "received"\n'
+        assert json.loads(entry)["level"] == "INFO"
+
+    def test_queued_exception_keeps_traceback(self) -> None:
+        """
+        Test that the traceback of a logged exception is included once the
+        record is taken from the queue and formatted.
+        """
+
+        queue: "Queue[logging.LogRecord]" = Queue(1)
+        logger = logging.getLogger("fideslog.tests.exception")
+        handler = DroppingQueueHandler(queue)
+        logger.addHandler(handler)
+        try:
+            try:
+                raise ValueError("Something went wrong")
+            except ValueError:
+                logger.exception("Failed to %s", "succeed")
+        finally:
+            logger.removeHandler(handler)
+
+        entry = json.loads(JSONFormatter().format(queue.get_nowait()))
+
+        assert entry["message"] == "Failed to succeed"
+        assert entry["exception"].startswith("Traceback")
+        assert "ValueError: Something went wrong" in entry["exception"]
+
+    def test_one_background_handler_per_logger(self) -> None:
+        """
+        Test that handling a logger's records in the background again replaces
+        its queue and thread, after handling the records already queued.
+        """
+
+        logger = logging.getLogger("fideslog_tests.background")
+        logger.propagate = False
+        first, second = StringIO(), StringIO()
+
+        handle_in_background(logger, logging.StreamHandler(first), 10)
+        logger.warning("first")
+        _, first_listener = background_handlers[logger.name]
+        handle_in_background(logger, logging.StreamHandler(second), 10)
+        logger.warning("second")
+        queue_handler, _ = background_handlers[logger.name]
+        handlers = list(logger.handlers)
+        stop_handling_in_background(logger)
+
+        assert handlers == [queue_handler]
+        assert logger.handlers == []
+        assert first_listener._thread is None  # pylint: disable=protected-access
+        assert first.getvalue() == "first\n"
+        assert second.getvalue() == "second\n"
@@ -0,0 +1,113 @@
+from json import dumps, loads
+from logging import FileHandler
+from pathlib import Path
+
+import pytest
+
+from fideslog.api.logger import background_handlers
+from fideslog.api.metrics import Registry, registry
+from fideslog.api.tracing import configure_tracing, log, span
+
+
+class TestRegistry:
+    def test_renders_counters(self) -> None:
+        """
+        Test that counters are rendered in the Prometheus text exposition format.
+        """
+
+        registry = Registry()
+        counter = registry.counter("requests_total", "Requests.", ("route",))
+        counter.inc("/health")
+        counter.inc("/health", amount=2)
+        counter.inc('/a"b')
+
+        assert registry.render().splitlines() == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{route="/health"} 3',
+            'requests_total{route="/a\\"b"} 1',
+        ]
+
+    def test_renders_cumulative_histogram_buckets(self) -> None:
+        """
+        Test that histogram buckets are cumulative, and include each boundary value.
+        """
+
+        registry = Registry()
+        histogram = registry.histogram("latency", "Latency.", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+
+        assert registry.render().splitlines()[2:] == [
+            'latency_bucket{le="0.1"} 2',
+            'latency_bucket{le="1"} 3',
+            'latency_bucket{le="+Inf"} 4',
+            "latency_sum 2.65",
+            "latency_count 4",
+        ]
+
+    def test_renders_metrics_shared_by_other_processes(self, tmp_path: Path) -> None:
+        """
+        Test that the metrics of other processes are combined with this process's.
+        """
+
+        registry = Registry()
+        counter = registry.counter("requests_total", "Requests.", ("route",))
+        histogram = registry.histogram("latency", "Latency.", buckets=(0.1,))
+        counter.inc("/health")
+        histogram.observe(0.05)
+        (tmp_path / "1.json").write_text(dumps(registry.snapshot()))
+        counter.inc("/events")
+
+        assert registry.render_shared(str(tmp_path)).splitlines() == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{route="/health"} 2',
+            'requests_total{route="/events"} 1',
+            "# HELP latency Latency.",
+            "# TYPE latency histogram",
+            'latency_bucket{le="0.1"} 2',
+            'latency_bucket{le="+Inf"} 2',
+            "latency_sum 0.1",
+            "latency_count 2",
+        ]
+
+
+class TestSpan:
+    def test_records_stage_duration(self) -> None:
+        """
+        Test that the duration of a stage is recorded, even when it raises.
+        """
+
+        with pytest.raises(ValueError):
+            with span("test_stage") as attributes:
+                raise ValueError()
+
+        assert attributes == {"error": "ValueError"}
+        assert 'fideslog_stage_duration_seconds_count{stage="test_stage"} 1' in (
+            registry.render().splitlines()
+        )
+
+    def test_writes_spans_in_background(self, tmp_path: Path) -> None:
+        """
+        Test that spans are written to the tracing destination by a background
+        thread, rather than by a handler of the tracing logger itself.
+        """
+
+        destination = tmp_path / "spans.jsonl"
+        configure_tracing(str(destination), 10)
+        try:
+            queue_handler, _ = background_handlers[log.name]
+            assert queue_handler in log.handlers
+            assert FileHandler not in {type(handler) for handler in log.handlers}
+            with span("outer"):
+                with span("inner"):
+                    pass
+        finally:
+            configure_tracing(None, 10)
+
+        inner, outer = [loads(line) for line in destination.read_text().splitlines()]
+        assert (inner["name"], outer["name"]) == ("inner", "outer")
+        assert inner["parent_id"] == outer["span_id"]
+        assert inner["trace_id"] == outer["trace_id"]
+        assert queue_handler not in log.handlers
@@ -0,0 +1,140 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.types import Receive, Scope, Send
+
+from fideslog.api.config import config
+from fideslog.api.main import app
+from fideslog.api.middleware import (
+    UNMATCHED_ROUTE,
+    VERSION_EXCLUDED_ENDPOINTS,
+    RequestMiddleware,
+    RoutePaths,
+)
+
+client = TestClient(app)
+
+
+async def failing_app(scope: Scope, receive: Receive, send: Send) -> None:
+    """An application that fails to handle any request."""
+
+    raise RuntimeError("Something went wrong")
+
+
+async def empty_response(_: object) -> Response:
+    """Respond to any request with no content."""
+
+    return Response()
+
+
+class TestRoutePaths:
+    def test_remembers_route_paths(self) -> None:
+        """
+        Test that the route matching each path is remembered, including when
+        no route matches, until the routes change.
+        """
+
+        app = SimpleNamespace(routes=[Route("/items/{item_id}", empty_response)])
+        route_paths = RoutePaths(max_entries=2)
+
+        assert route_paths.get({"app": app, "path": "/items/1"}) == "/items/{item_id}"
+        assert route_paths.get({"app": app, "path": "/other"}) == UNMATCHED_ROUTE
+        assert route_paths.paths == {
+            "/items/1": "/items/{item_id}",
+            "/other": UNMATCHED_ROUTE,
+        }
+
+        app.routes.append(Route("/other", empty_response))
+
+        assert route_paths.get({"app": app, "path": "/other"}) == "/other"
+        assert route_paths.paths == {"/other": "/other"}
+
+    def test_evicts_least_recently_used(self) -> None:
+        """
+        Test that only the most recently requested paths are remembered.
+        """
+
+        app = SimpleNamespace(routes=[Route("/items/{item_id}", empty_response)])
+        route_paths = RoutePaths(max_entries=2)
+
+        for path in ("/items/1", "/items/2", "/items/1", "/items/3"):
+            route_paths.get({"app": app, "path": path})
+
+        assert list(route_paths.paths) == ["/items/1", "/items/3"]
+
+
+class TestRequestMiddleware:
+    def test_missing_version_header(self) -> None:
+        """
+        Test that requests without the `X-Fideslog-Version` header are rejected.
+        """
+
+        response = client.post("/events", json={})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"error": "Missing required header(s)"}
+
+    @pytest.mark.parametrize("path", VERSION_EXCLUDED_ENDPOINTS)
+    def test_excluded_endpoints(self, path: str) -> None:
+        """
+        Test that the excluded endpoints do not require any headers.
+        """
+
+        response = client.get(path)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    @pytest.mark.parametrize(
+        "headers",
+        [
+            {"X-Fideslog-Version": "1.0.0"},
+            {"Authorization": "Token wrong", "X-Fideslog-Version": "1.0.0"},
+        ],
+    )
+    def test_secured_endpoint_requires_token(self, headers: dict) -> None:
+        """
+        Test that registrations are not listed without the access token.
+        """
+
+        response = client.get("/registrations", headers=headers)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.headers["WWW-Authenticate"] == "Token <value>"
+
+    def test_logs_rejected_requests(
+        self,
+        caplog: pytest.LogCaptureFixture,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """
+        Test that rejected requests are logged, even when successful
+        requests are not.
+        """
+
+        monkeypatch.setattr(config.logging, "request_sample_rate", 0.0)
+        with caplog.at_level(logging.INFO, logger="fideslog.api.middleware"):
+            client.get("/registrations")
+            client.get("/health")
+
+        assert [record.getMessage().split("\t")[1] for record in caplog.records] == [
+            '"GET /registrations" 400 Bad Request'
+        ]
+
+    def test_logs_failed_requests(self, caplog: pytest.LogCaptureFixture) -> None:
+        """
+        Test that requests are logged even if the application raises an error.
+        """
+
+        failing_client = TestClient(RequestMiddleware(failing_app))
+        with caplog.at_level(logging.INFO, logger="fideslog.api.middleware"):
+            with pytest.raises(RuntimeError):
+                failing_client.get("/events", headers={"X-Fideslog-Version": "1.0.0"})
+
+        assert [record.getMessage().split("\t")[1] for record in caplog.records] == [
+            '"GET /events" 500 Internal Server Error'
+        ]
@@ -0,0 +1,157 @@
+from asyncio import run
+from typing import List
+
+import pytest
+
+from fideslog.api.rate_limit import (
+    MemoryRateLimitStore,
+    RateLimit,
+    RateLimiter,
+    parse_rate_limit,
+)
+
+
+class Clock:
+    """A clock that only moves when told to."""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def hit_many(limiter: RateLimiter, key: str, route: str, hits: int) -> List[bool]:
+    """Return whether each of `hits` requests was allowed."""
+
+    results = [limiter.hit(key, "GET", route) for _ in range(hits)]
+    return [result.allowed for result in results if result is not None]
+
+
+class TestParseRateLimit:
+    def test_parses_rate_limits(self) -> None:
+        """
+        Test that the supported rate limit formats are parsed.
+        """
+
+        assert parse_rate_limit("100/minute") == RateLimit(100, 1, "minute")
+        assert parse_rate_limit("100 per Minute") == RateLimit(100, 1, "minute")
+        assert parse_rate_limit("1000/5 minutes") == RateLimit(1000, 5, "minute")
+        assert parse_rate_limit("exempt") is None
+
+    def test_catch_invalid_rate_limits(self) -> None:
+        """
+        Test that invalid rate limits are rejected.
+        """
+
+        for value in ("100", "0/minute", "100/fortnight"):
+            with pytest.raises(ValueError):
+                parse_rate_limit(value)
+
+
+class TestRateLimiter:
+    def test_limits_each_key_and_route(self) -> None:
+        """
+        Test that requests beyond the limit are rejected, separately per key and route.
+        """
+
+        limiter = RateLimiter("2/minute", {}, max_keys=10, clock=Clock(60))
+
+        assert hit_many(limiter, "a", "/events", 3) == [True, True, False]
+        assert hit_many(limiter, "b", "/events", 1) == [True]
+        assert hit_many(limiter, "a", "/registrations", 1) == [True]
+
+    def test_applies_route_limits(self) -> None:
+        """
+        Test that routes use their configured limits, and that exempt routes are not counted.
+        """
+
+        limiter = RateLimiter(
+            "1/minute",
+            {"/events": "3/minute"},
+            max_keys=10,
+            clock=Clock(60),
+        )
+
+        assert hit_many(limiter, "a", "/events", 4) == [True, True, True, False]
+        assert limiter.hit("a", "GET", "/health") is None
+        assert not limiter.windows.get(("a", "GET", "/health"))
+
+    def test_weights_previous_window(self) -> None:
+        """
+        Test that the previous window's count decays over the current window.
+        """
+
+        clock = Clock(60)
+        limiter = RateLimiter("4/minute", {}, max_keys=10, clock=clock)
+        hit_many(limiter, "a", "/events", 4)
+
+        clock.now = 150  # Half of the previous window's 4 requests still count
+        assert hit_many(limiter, "a", "/events", 3) == [True, True, False]
+
+        result = limiter.hit("a", "GET", "/events")
+        assert result is not None and result.reset == 165
+
+    def test_evicts_least_recently_used_keys(self) -> None:
+        """
+        Test that only the most recently seen keys are retained.
+        """
+
+        limiter = RateLimiter("1/minute", {}, max_keys=2, clock=Clock(60))
+        for key in ("a", "b", "a", "c"):
+            limiter.hit(key, "GET", "/events")
+
+        assert list(limiter.windows) == [
+            ("a", "GET", "/events"),
+            ("c", "GET", "/events"),
+        ]
+
+    def test_shares_counts_through_backend(self) -> None:
+        """
+        Test that limiters sharing a store enforce the limit on their combined requests.
+        """
+
+        store = MemoryRateLimitStore()
+        first, second = (
+            RateLimiter("4/minute", {}, max_keys=10, store=store, clock=Clock(60))
+            for _ in range(2)
+        )
+
+        assert hit_many(first, "a", "/events", 2) == [True, True]
+        assert hit_many(second, "a", "/events", 1) == [True]
+        run(first.sync())
+        run(second.sync())
+
+        assert hit_many(second, "a", "/events", 2) == [True, False]
+        run(second.sync())
+        run(first.sync())  # Nothing to sync, so still unaware of the latest request
+        assert hit_many(first, "a", "/events", 1) == [True]
+        run(first.sync())
+
+        assert store.totals == {"a:GET:/events:1": 5}
+        assert hit_many(first, "a", "/events", 1) == [False]
+
+    def test_limits_clients_and_their_address(self) -> None:
+        """
+        Test that requests are limited per client ID, and per IP address across all clients.
+        """
+
+        limiter = RateLimiter(
+            "2/minute",
+            {"*": "4/minute"},
+            max_keys=10,
+            clock=Clock(60),
+        )
+        results = [
+            limiter.hit_client("10.0.0.1", client_id, "POST", "/events")
+            for client_id in ("a", "a", "a", "b", "c", None)
+        ]
+
+        assert [result.allowed for result in results if result] == [
+            True,
+            True,
+            False,
+            True,
+            False,
+            True,  # Without a client ID, only the route's limit for the address applies
+        ]
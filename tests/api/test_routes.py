@@ -1,11 +1,71 @@
+# pylint: disable=redefined-outer-name
+
+import csv
+import json
+from datetime import datetime, timezone
+from typing import Any, Generator
+
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
 
+from fideslog.api import database
+from fideslog.api.cache import MemoryBackend, ResponseCache
+from fideslog.api.config import config
+from fideslog.api.database import get_db, get_storage
+from fideslog.api.database import registrations as registration_queries
+from fideslog.api.database.registrations import create
 from fideslog.api.main import app
+from fideslog.api.routes import registrations as registration_routes
+from fideslog.api.schemas.registration import Registration
 
 client = TestClient(app)
 
+HEADERS = {"Authorization": "Token fides", "X-Fideslog-Version": "1.0.0"}
+
+
+def add_registrations(database: Session, count: int) -> None:
+    """
+    Create `count` registrations, each more recent than the last.
+    """
+
+    for i in range(count):
+        created_at = datetime(2022, 1, i + 1, tzinfo=timezone.utc)
+        create(
+            database,
+            Registration(
+                client_id=f"client_{i}",
+                email=f"user_{i}@example.com",
+                organization="Ethyca",
+                created_at=created_at,
+                updated_at=created_at,
+            ),
+        )
+
+
+@pytest.fixture()
+def api_database(sqlite_session: Session) -> Generator:
+    """
+    Yield the database session used by the API server's routes.
+    """
+
+    app.dependency_overrides[get_db] = lambda: sqlite_session
+    yield sqlite_session
+    del app.dependency_overrides[get_db]
+
+
+@pytest.fixture()
+def api_cache(monkeypatch: pytest.MonkeyPatch) -> ResponseCache:
+    """
+    Return an empty registration cache, used in place of the API server's.
+    """
+
+    response_cache = ResponseCache(MemoryBackend(max_entries=16), ttl=60)
+    monkeypatch.setattr(registration_queries, "registration_cache", response_cache)
+    monkeypatch.setattr(registration_routes, "registration_cache", response_cache)
+    return response_cache
+
 
 @pytest.mark.skip(
     "Starlette test client breaks in this FastAPI version. We either need to upgrade the version, or more likely, deprecate fideslog entirely."
@@ -17,3 +77,208 @@ def test_health() -> None:
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"status": "healthy"}
+
+
+@pytest.fixture()
+def api_storage(storage: Any) -> Generator:
+    """
+    Yield the event storage used by the API server's routes.
+    """
+
+    app.dependency_overrides[get_storage] = lambda: storage
+    yield storage
+    del app.dependency_overrides[get_storage]
+
+
+def test_add_event_accepted(
+    api_storage: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that the event is stored, and omitted from the response, in the
+    `accepted` response mode.
+    """
+
+    monkeypatch.setattr(config.events, "response_mode", "accepted")
+    event = {
+        "client_id": "test_client_id",
+        "event": "test_event",
+        "event_created_at": "2022-02-21T00:00:00+00:00",
+        "os": "darwin",
+        "product_name": "test_product",
+        "production_version": "1.2.3",
+    }
+
+    response = client.post("/events", json=event, headers=HEADERS)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.content == b""
+    assert len(api_storage.objects) == 1
+
+
+@pytest.mark.usefixtures("api_cache")
+class TestRegistrations:
+    def test_list_etag(self, api_database: Session) -> None:
+        """
+        Test that listed registrations include an entity tag, and that an empty
+        304 response is returned to requests that already have them.
+        """
+
+        add_registrations(api_database, 2)
+        response = client.get("/registrations", headers=HEADERS)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["client_id"] for row in response.json()] == [
+            "client_1",
+            "client_0",
+        ]
+        etag = response.headers["ETag"]
+
+        response = client.get(
+            "/registrations",
+            headers={**HEADERS, "If-None-Match": f'W/"other", {etag}'},
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+    def test_list_etag_changes(self, api_database: Session) -> None:
+        """
+        Test that a new registration is listed, with a new entity tag, even
+        though the previous listing was cached.
+        """
+
+        add_registrations(api_database, 1)
+        etag = client.get("/registrations", headers=HEADERS).headers["ETag"]
+        add_registrations(api_database, 2)
+        response = client.get(
+            "/registrations",
+            headers={**HEADERS, "If-None-Match": etag},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+        assert len(response.json()) == 3
+
+    @pytest.mark.parametrize(
+        "email",
+        ["user_1@example.com", "User_1@Example.COM", " user_1@example.com "],
+    )
+    def test_list_by_email(self, api_database: Session, email: str) -> None:
+        """
+        Test that only the registrations for an email address are listed,
+        regardless of its case and surrounding whitespace.
+        """
+
+        add_registrations(api_database, 3)
+        response = client.get(
+            "/registrations", headers=HEADERS, params={"email": email}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["client_id"] for row in response.json()] == ["client_1"]
+
+    def test_list_cache_key_includes_email(self, api_database: Session) -> None:
+        """
+        Test that listings for different email addresses are cached separately.
+        """
+
+        add_registrations(api_database, 3)
+        everyone = client.get("/registrations", headers=HEADERS)
+        one_user = client.get(
+            "/registrations",
+            headers=HEADERS,
+            params={"email": "user_1@example.com"},
+        )
+        other_user = client.get(
+            "/registrations",
+            headers=HEADERS,
+            params={"email": "user_2@example.com"},
+        )
+
+        assert len(everyone.json()) == 3
+        assert [row["client_id"] for row in one_user.json()] == ["client_1"]
+        assert [row["client_id"] for row in other_user.json()] == ["client_2"]
+        assert (
+            len(
+                {
+                    response.headers["ETag"]
+                    for response in (everyone, one_user, other_user)
+                }
+            )
+            == 3
+        )
+
+    def test_export_ndjson(self, api_database: Session) -> None:
+        """
+        Test that all registrations are exported as a JSON object per line,
+        most recent first, with decrypted email addresses.
+        """
+
+        add_registrations(api_database, 3)
+        response = client.get("/registrations/export", headers=HEADERS)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["client_id"] for row in rows] == [
+            "client_2",
+            "client_1",
+            "client_0",
+        ]
+        assert rows[0]["email"] == "user_2@example.com"
+        assert list(rows[0]) == registration_routes.EXPORT_FIELDS
+
+    def test_export_csv(
+        self,
+        api_database: Session,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """
+        Test that all registrations are exported as CSV after a header row,
+        when they are read and sent in more than one batch.
+        """
+
+        monkeypatch.setattr(registration_queries, "EXPORT_BATCH_SIZE", 2)
+        monkeypatch.setattr(registration_routes, "EXPORT_BATCH_SIZE", 2)
+        add_registrations(api_database, 5)
+        response = client.get(
+            "/registrations/export",
+            headers=HEADERS,
+            params={"format": "csv"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/csv")
+        header, *rows = list(csv.reader(response.text.splitlines()))
+        assert header == registration_routes.EXPORT_FIELDS
+        assert [row[0] for row in rows] == [f"client_{i}" for i in range(4, -1, -1)]
+
+    def test_export_requires_token(self, api_database: Session) -> None:
+        """
+        Test that registrations are not exported without the access token.
+        """
+
+        add_registrations(api_database, 1)
+        response = client.get(
+            "/registrations/export",
+            headers={"X-Fideslog-Version": "1.0.0"},
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_database_not_configured(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Test that registration requests fail with a `503` response when the
+        database connection is not configured.
+        """
+
+        monkeypatch.setattr(database, "engine", None)
+        for name in ("account", "db_connection_uri", "password", "user"):
+            monkeypatch.setattr(config.database, name, None)
+
+        response = client.get("/registrations", headers=HEADERS)
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json() == {"detail": "Service unavailable"}
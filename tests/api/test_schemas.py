@@ -6,7 +6,8 @@ from typing import Generator
 import pytest
 from pydantic import ValidationError
 
-from fideslog.api.schemas.analytics_event import AnalyticsEvent
+from fideslog.api.metrics import VALIDATION_CACHE
+from fideslog.api.schemas.analytics_event import AnalyticsEvent, endpoint_cache
 from fideslog.api.schemas.registration import Registration
 
 
@@ -56,6 +57,68 @@ class TestAnalyticsEventSchema:
 
         assert "endpoint URL must be a valid URL" in str(err)
 
+    def test_analytic_event_truncated_endpoint(
+        self, analytics_event_payload: dict
+    ) -> None:
+        """
+        Test that endpoints already truncated to their path by the client are valid.
+        """
+
+        event = AnalyticsEvent.parse_obj(
+            {**analytics_event_payload, "endpoint": "post: /api/v1/path"}
+        )
+
+        assert event.endpoint == "POST: /api/v1/path"
+
+    def test_analytic_event_endpoint_validation_cache(
+        self, analytics_event_payload: dict
+    ) -> None:
+        """
+        Test that endpoints are validated once, regardless of the formatting
+        of the HTTP method and URL.
+        """
+
+        endpoint_cache.clear()
+        hits = VALIDATION_CACHE.values.get(("endpoint", "hit"), 0)
+        misses = VALIDATION_CACHE.values.get(("endpoint", "miss"), 0)
+
+        for endpoint in [
+            "GET: http://0.0.0.0:8080/path",
+            " get :http://0.0.0.0:8080/path",
+        ]:
+            event = AnalyticsEvent.parse_obj(
+                {**analytics_event_payload, "endpoint": endpoint}
+            )
+            assert event.endpoint == "GET: http://0.0.0.0:8080/path"
+
+        assert VALIDATION_CACHE.values[("endpoint", "hit")] == hits + 1
+        assert VALIDATION_CACHE.values[("endpoint", "miss")] == misses + 1
+
+    def test_analytic_event_endpoint_cache_key(
+        self, analytics_event_payload: dict
+    ) -> None:
+        """
+        Test that endpoints differing only by their query string, fragment, or
+        resource identifiers share a single cache entry, and are not altered.
+        """
+
+        endpoint_cache.clear()
+        endpoints = [
+            "GET: https://www.example.com/api/v1/privacy-request/pri_0d5e2d1a-4b6e-4ad4-9d1e-8bb1a3b1c2d3?page=1",
+            "GET: https://www.example.com/api/v1/privacy-request/pri_9f8e7d6c-5b4a-4321-8fed-cba987654321?page=2#top",
+            "GET: https://www.example.com/api/v1/privacy-request/42",
+        ]
+
+        for endpoint in endpoints:
+            event = AnalyticsEvent.parse_obj(
+                {**analytics_event_payload, "endpoint": endpoint}
+            )
+            assert event.endpoint == endpoint
+
+        assert list(endpoint_cache.results) == [
+            "GET: https://www.example.com/api/v1/privacy-request/0"
+        ]
+
 
 class TestUserRegistrationEventSchema:
     @pytest.fixture()
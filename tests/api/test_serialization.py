@@ -0,0 +1,50 @@
+import sys
+
+import pytest
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from fideslog.api.serialization import encode_with_json, select_encoder
+
+CONTENT = {"email": "jöhn@example.com", "counts": [1, 2.5, None], "docker": True}
+
+
+class TestSerialization:
+    def test_encoders_are_equivalent(self) -> None:
+        """
+        Test that orjson renders response bodies identically to the standard
+        library encoder, so that either may be used.
+        """
+
+        orjson = pytest.importorskip("orjson")
+
+        assert orjson.dumps(CONTENT) == encode_with_json(CONTENT)
+
+    def test_select_stdlib(self) -> None:
+        """
+        Test that the standard library encoder is used when configured,
+        even if orjson is installed.
+        """
+
+        assert select_encoder("stdlib") == (encode_with_json, JSONResponse)
+
+    @pytest.mark.parametrize("json_encoder", ["auto", "orjson"])
+    def test_select_orjson(self, json_encoder: str) -> None:
+        """
+        Test that orjson is used when it is installed, unless configured otherwise.
+        """
+
+        orjson = pytest.importorskip("orjson")
+
+        assert select_encoder(json_encoder) == (orjson.dumps, ORJSONResponse)
+
+    def test_select_without_orjson(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Test that `auto` falls back to the standard library encoder when orjson
+        is not installed, and that requiring orjson fails.
+        """
+
+        monkeypatch.setitem(sys.modules, "orjson", None)
+
+        assert select_encoder("auto") == (encode_with_json, JSONResponse)
+        with pytest.raises(ImportError):
+            select_encoder("orjson")
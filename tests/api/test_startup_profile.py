@@ -0,0 +1,49 @@
+from fideslog.api.startup_profile import (
+    START_MARKER,
+    ModuleImport,
+    parse_import_times,
+    summarize,
+)
+
+IMPORT_TIME_OUTPUT = f"""import time: self [us] | cumulative | imported package
+import time:       100 |        100 | argparse
+{START_MARKER}
+import time:        50 |         50 |     botocore.utils
+import time:       200 |        250 |   botocore
+import time:        30 |        280 | boto3
+Configuration in use: {{}}
+"""
+
+
+class TestStartupProfile:
+    def test_parse_import_times(self) -> None:
+        """
+        Test that only the imports reported after the profiling began are parsed.
+        """
+
+        assert list(parse_import_times(IMPORT_TIME_OUTPUT)) == [
+            ModuleImport("botocore.utils", 50, 50),
+            ModuleImport("botocore", 200, 250),
+            ModuleImport("boto3", 30, 280),
+        ]
+
+    def test_summarize(self) -> None:
+        """
+        Test that import times are totalled per package, and that only the
+        slowest modules are included.
+        """
+
+        imports = list(parse_import_times(IMPORT_TIME_OUTPUT))
+        profile = summarize("api", {"load_config": 400}, imports, top=1)
+
+        assert profile["target"] == "fideslog.api.main"
+        assert profile["total_us"] == 400
+        assert profile["import_us"] == 280
+        assert profile["phases"] == [{"name": "load_config", "us": 400}]
+        assert profile["packages"] == [
+            {"name": "botocore", "self_us": 250},
+            {"name": "boto3", "self_us": 30},
+        ]
+        assert profile["modules"] == [
+            {"name": "boto3", "self_us": 30, "cumulative_us": 280}
+        ]
@@ -6,7 +6,7 @@ from typing import Generator
 import pytest
 
 from fideslog.sdk.python.client import AnalyticsClient
-from fideslog.sdk.python.event import AnalyticsEvent
+from fideslog.sdk.python.event import AnalyticsEvent, is_valid_endpoint
 
 
 @pytest.fixture()
@@ -77,3 +77,130 @@ def test_rich_event_payload(test_rich_additional_payload: AnalyticsEvent) -> Non
     assert test_rich_additional_payload.docker
     assert test_rich_additional_payload.status_code == 200
     assert isinstance(test_rich_additional_payload.extra_data, dict)
+
+
+def test_client_id_header(test_create_client: AnalyticsClient) -> None:
+    """
+    Test that requests identify the client in a header, for rate limiting.
+    """
+
+    assert test_create_client.headers["X-Fideslog-Client-Id"] == "fake_client_id"
+    assert "X-Fideslog-Version" in test_create_client.headers
+
+
+def test_endpoint_validation_is_cached() -> None:
+    """
+    Test that each endpoint is validated once, regardless of the formatting
+    of the HTTP method and URL.
+    """
+
+    is_valid_endpoint.cache_clear()
+    for endpoint in ["GET: http://0.0.0.0:8080/path", " get :http://0.0.0.0:8080/path"]:
+        event = AnalyticsEvent(
+            event="endpoint_call",
+            event_created_at=datetime.now(timezone.utc),
+            endpoint=endpoint,
+            local_host=True,
+            status_code=200,
+        )
+        assert event.endpoint == "GET: http://0.0.0.0:8080/path"
+
+    assert is_valid_endpoint.cache_info().hits == 1
+    assert is_valid_endpoint.cache_info().misses == 1
+
+
+def test_truncate_endpoints() -> None:
+    """
+    Test that only the endpoint path is sent when `truncate_endpoints` is enabled.
+    """
+
+    client = AnalyticsClient(
+        client_id="fake_client_id",
+        os="Darwin",
+        product_name="fideslog",
+        production_version="1.2.3",
+        truncate_endpoints=True,
+    )
+    event = AnalyticsEvent(
+        event="endpoint_call",
+        event_created_at=datetime.now(timezone.utc),
+        endpoint="GET: https://www.example.com/api/v1/path?query=value#fragment",
+        local_host=False,
+        status_code=200,
+    )
+
+    payload = client._AnalyticsClient__get_request_payload(event)  # type: ignore
+
+    assert payload["endpoint"] == "GET: /api/v1/path"
+    assert event.endpoint.endswith("?query=value#fragment")
+
+
+def test_event_payload_extras(
+    test_create_client: AnalyticsClient,
+    test_rich_additional_payload: AnalyticsEvent,
+) -> None:
+    """
+    Test that optional attributes are included in the payload only when set.
+    """
+
+    payload = test_create_client._AnalyticsClient__get_request_payload(  # type: ignore
+        test_rich_additional_payload
+    )
+
+    assert payload["command"] == "test_command"
+    assert payload["status_code"] == 200
+    assert "endpoint" not in payload
+    assert not hasattr(test_rich_additional_payload, "__dict__")
+
+
+def test_event_payload_extra_data() -> None:
+    """
+    Test that the client's static fields and extra_data are included in each
+    payload, with the event's extra_data taking priority.
+    """
+
+    client = AnalyticsClient(
+        client_id="fake_client_id",
+        os="Darwin",
+        product_name="fideslog",
+        production_version="1.2.3",
+        extra_data={"shared": "client", "client": True},
+    )
+    get_payload = client._AnalyticsClient__get_request_payload  # type: ignore
+    event = AnalyticsEvent(
+        event="test_event",
+        event_created_at=datetime.now(timezone.utc),
+        extra_data={"shared": "event"},
+    )
+
+    payload = get_payload(event)
+
+    assert payload["client_id"] == "fake_client_id"
+    assert payload["product_name"] == "fideslog"
+    assert payload["extra_data"] == {"shared": "event", "client": True}
+    assert client.extra_data == {"shared": "client", "client": True}
+
+
+def test_event_payload_reflects_client_changes(
+    test_create_client: AnalyticsClient,
+    test_basic_additional_payload: AnalyticsEvent,
+) -> None:
+    """
+    Test that changes to the client's attributes are included in later payloads
+    and headers, and that the payload's extra_data is not shared with the client
+    or event.
+    """
+
+    get_payload = test_create_client._AnalyticsClient__get_request_payload  # type: ignore
+    test_create_client.client_id = "new_client_id"
+    test_create_client.developer_mode = True
+    test_create_client.production_version = "1.2.4"
+
+    payload = get_payload(test_basic_additional_payload)
+
+    assert payload["client_id"] == "new_client_id"
+    assert test_create_client.headers["X-Fideslog-Client-Id"] == "new_client_id"
+    assert payload["developer"] is True
+    assert payload["production_version"] == "1.2.4"
+    assert payload["extra_data"] is not test_create_client.extra_data
+    assert payload["extra_data"] is not test_basic_additional_payload.extra_data